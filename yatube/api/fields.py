@@ -0,0 +1,97 @@
+"""Поля ресурсов API: имя в ответе и путь к значению в базе.
+
+Ответы строятся из queryset.values() по выбранным полям, поэтому
+?fields= сокращает и JSON, и сам запрос: невыбранные колонки и таблицы
+не читаются.
+"""
+from django.core.files.storage import default_storage
+
+
+class BadRequest(ValueError):
+    """Ошибка в параметрах запроса; API отвечает на неё кодом 400."""
+
+
+def _media_url(name):
+    return default_storage.url(name) if name else None
+
+
+class Fields:
+    def __init__(self, fields, transforms=None, required=()):
+        self.fields = fields
+        self.transforms = transforms or {}
+        # Колонки, которые нужны пагинации, даже если их не просили.
+        self.required = required
+
+    def select(self, names=None):
+        """Проверяет имена из ?fields= и возвращает выбранные поля.
+
+        Для неизвестного имени бросает BadRequest.
+        """
+        if not names:
+            return dict(self.fields)
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise BadRequest(
+                'Неизвестные поля: ' + ', '.join(unknown)
+            )
+        return {name: self.fields[name] for name in names}
+
+    def values(self, queryset, selected, prefix='', required=None):
+        lookups = {prefix + lookup for lookup in selected.values()}
+        lookups.update(self.required if required is None else required)
+        return queryset.values(*lookups)
+
+    def render(self, row, selected, prefix=''):
+        data = {}
+        for name, lookup in selected.items():
+            value = row[prefix + lookup]
+            transform = self.transforms.get(name)
+            data[name] = transform(value) if transform else value
+        return data
+
+
+POST = Fields(
+    {
+        'id': 'id',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'author': 'author__username',
+        'group': 'group__slug',
+        'image': 'image',
+        'comments_count': 'comments_count',
+    },
+    transforms={'image': _media_url},
+    required=('id', 'pub_date'),
+)
+
+COMMENT = Fields(
+    {
+        'id': 'id',
+        'post': 'post_id',
+        'author': 'author__username',
+        'text': 'text',
+        'created': 'created',
+    },
+    required=('id', 'created'),
+)
+
+GROUP = Fields(
+    {
+        'id': 'id',
+        'title': 'title',
+        'slug': 'slug',
+        'description': 'description',
+    },
+    required=('id',),
+)
+
+USER = Fields(
+    {
+        'username': 'username',
+        'first_name': 'first_name',
+        'last_name': 'last_name',
+        'posts_count': 'stats__posts_count',
+        'followers_count': 'stats__followers_count',
+        'following_count': 'stats__following_count',
+    },
+)
@@ -0,0 +1,141 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Group, Post
+from posts.paginator import encode_cursor
+
+from .. import fields
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой')
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        start = timezone.now() - timedelta(days=1)
+        cls.posts = []
+        for number in range(settings.PAGE_POST + 3):
+            post = Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {number}')
+            # Даты разводятся явно, чтобы порядок не зависел от часов.
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=start + timedelta(minutes=number))
+            post.refresh_from_db()
+            cls.posts.append(post)
+        cls.comment = Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Комментарий')
+
+    def get(self, name, *args, client=None, **params):
+        client = client or self.client
+        return client.get(reverse(f'api:{name}', args=args), params)
+
+    def test_posts_are_paginated_by_cursor(self):
+        with self.assertNumQueries(1):
+            data = self.get('posts').json()
+        self.assertEqual(len(data['results']), settings.PAGE_POST)
+        self.assertEqual(data['results'][0]['text'], self.posts[-1].text)
+        self.assertEqual(data['results'][0]['author'], 'author')
+        self.assertEqual(data['results'][0]['group'], 'group')
+        data = self.get('posts', after=data['next']).json()
+        self.assertEqual(
+            [post['text'] for post in data['results']],
+            [post.text for post in self.posts[2::-1]],
+        )
+        self.assertIsNone(data['next'])
+
+    def test_sparse_fields_and_batched_ids(self):
+        ids = [self.posts[2].pk, self.posts[0].pk, 0]
+        data = self.get(
+            'posts', fields='id,text', ids=','.join(map(str, ids))).json()
+        self.assertEqual(data['results'], [
+            {'id': self.posts[2].pk, 'text': self.posts[2].text},
+            {'id': self.posts[0].pk, 'text': self.posts[0].text},
+        ])
+        response = self.get('posts', fields='id,password')
+        self.assertEqual(response.status_code, 400)
+        response = self.get('posts', ids='1,x')
+        self.assertEqual(response.status_code, 400)
+
+    def test_since_returns_only_new_posts(self):
+        data = self.get('posts', since=self.posts[-3].pub_date.isoformat())
+        data = data.json()
+        self.assertEqual(
+            [post['text'] for post in data['results']],
+            [post.text for post in self.posts[-3:]],
+        )
+        self.assertFalse(data['has_more'])
+        new_post = Post.objects.create(author=self.author, text='Новый')
+        data = self.get('posts', since=data['since']).json()
+        self.assertEqual(
+            [post['id'] for post in data['results']], [new_post.pk])
+
+    def test_detail_endpoints(self):
+        data = self.get('post_detail', self.posts[0].pk).json()
+        self.assertEqual(data['comments_count'], 1)
+        self.assertIsNone(data['image'])
+        data = self.get('post_comments', self.posts[0].pk).json()
+        self.assertEqual(data['results'][0]['text'], self.comment.text)
+        data = self.get('comments', ids=str(self.comment.pk)).json()
+        self.assertEqual(data['results'][0]['author'], 'reader')
+        self.assertEqual(self.get('comments').status_code, 400)
+        data = self.get('group_detail', 'group', fields='title').json()
+        self.assertEqual(data, {'title': 'Группа'})
+        data = self.get('groups').json()
+        self.assertEqual(data['results'][0]['slug'], 'group')
+        data = self.get('user_detail', 'author').json()
+        self.assertEqual(data['posts_count'], len(self.posts))
+        self.assertEqual(data['followers_count'], 1)
+        self.assertEqual(data['last_name'], 'Толстой')
+        self.assertEqual(self.get('user_detail', 'nobody').status_code, 404)
+        self.assertEqual(self.get('post_detail', 0).status_code, 404)
+
+    def test_groups_are_paginated_by_cursor(self):
+        for number in range(settings.PAGE_POST):
+            Group.objects.create(title=f'Группа {number}', slug=f'g{number}')
+        with self.assertNumQueries(1):
+            data = self.get('groups', fields='slug').json()
+        self.assertEqual(len(data['results']), settings.PAGE_POST)
+        self.assertEqual(
+            data['results'][0], {'slug': f'g{settings.PAGE_POST - 1}'})
+        data = self.get('groups', fields='slug', after=data['next']).json()
+        self.assertEqual(data['results'], [{'slug': 'group'}])
+        self.assertIsNone(data['next'])
+
+    def test_bad_cursor_is_rejected(self):
+        self.assertEqual(self.get('posts', after='битый').status_code, 400)
+        # Курсор списка групп (только ключ) не подходит к списку постов.
+        group_cursor = encode_cursor(None, self.group.pk)
+        for name in ('after', 'before', 'since'):
+            response = self.get('posts', **{name: group_cursor})
+            self.assertEqual(response.status_code, 400)
+
+    def test_server_errors_are_not_bad_requests(self):
+        with mock.patch.object(
+            fields.POST, 'render', side_effect=ValueError('ошибка')
+        ), self.assertRaises(ValueError):
+            self.get('posts')
+
+    def test_feed_requires_login(self):
+        self.assertEqual(self.get('feed').status_code, 401)
+        self.client.force_login(self.reader)
+        data = self.get('feed', fields='id').json()
+        self.assertEqual(
+            data['results'][0], {'id': self.posts[-1].pk})
+        data = self.get('feed', after=data['next']).json()
+        self.assertEqual(len(data['results']), 3)
+
+    def test_api_is_read_only(self):
+        response = self.client.post(reverse('api:posts'), {'text': 'x'})
+        self.assertEqual(response.status_code, 405)
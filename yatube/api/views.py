@@ -0,0 +1,183 @@
+from functools import wraps
+
+from django.conf import settings
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.models import Comment, Group, Post, User
+from posts.paginator import CursorPaginator
+
+from . import fields
+from .fields import BadRequest
+
+# Сколько объектов можно запросить одним ?ids=
+MAX_IDS = 100
+
+
+def api_view(login_required=False):
+    """Отдаёт JSON только на GET и превращает ошибки в JSON-ответы."""
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return JsonResponse(
+                    {'error': 'API только для чтения'}, status=405)
+            if login_required and not request.user.is_authenticated:
+                return JsonResponse(
+                    {'error': 'Нужна авторизация'}, status=401)
+            try:
+                data = view_func(request, *args, **kwargs)
+            except BadRequest as error:
+                return JsonResponse({'error': str(error)}, status=400)
+            except Http404:
+                return JsonResponse({'error': 'Не найдено'}, status=404)
+            return JsonResponse(data)
+        return wrapper
+    return decorator
+
+
+def _selected(request, spec):
+    names = request.GET.get('fields')
+    return spec.select(names.split(',') if names else None)
+
+
+def _ids(request):
+    raw = request.GET.get('ids')
+    if raw is None:
+        return None
+    try:
+        ids = [int(value) for value in raw.split(',') if value]
+    except ValueError:
+        raise BadRequest('ids — список чисел через запятую')
+    if len(ids) > MAX_IDS:
+        raise BadRequest(f'В ids не больше {MAX_IDS} значений')
+    return ids
+
+
+def _cursor(paginator, request, name):
+    token = request.GET.get(name)
+    if token and paginator.decode(token) is None:
+        raise BadRequest(f'{name} — неверный курсор')
+    return token
+
+
+def _since(paginator, value):
+    position = paginator.decode(value)
+    if position is not None:
+        return position
+    date = parse_datetime(value) if paginator.date_field else None
+    if date is None:
+        raise BadRequest('since — курсор или дата в формате ISO 8601')
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date, 0
+
+
+def _list(request, queryset, spec, date_field, pk_field='id', prefix=''):
+    """Список объектов: по ?ids=, страница по курсору или догрузка ?since=.
+
+    Все три режима читают только выбранные поля одним запросом.
+    """
+    selected = _selected(request, spec)
+    required = (date_field, pk_field) if prefix else None
+    rows = spec.values(queryset, selected, prefix, required)
+
+    def render(items):
+        return [spec.render(row, selected, prefix) for row in items]
+
+    ids = _ids(request)
+    if ids is not None:
+        found = {
+            row[pk_field]: row
+            for row in rows.filter(**{f'{pk_field}__in': ids})
+        }
+        return {'results': render(found[pk] for pk in ids if pk in found)}
+
+    paginator = CursorPaginator(
+        rows, settings.PAGE_POST, date_field=date_field, pk_field=pk_field
+    )
+    if 'since' in request.GET:
+        page = paginator.get_since(_since(paginator, request.GET['since']))
+        return {
+            'results': render(page),
+            'since': page.since_cursor,
+            'has_more': page.has_more,
+        }
+    page = paginator.get_page(
+        after=_cursor(paginator, request, 'after'),
+        before=_cursor(paginator, request, 'before'),
+    )
+    return {
+        'results': render(page),
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    }
+
+
+def _detail(request, queryset, spec):
+    selected = _selected(request, spec)
+    row = spec.values(queryset, selected).first()
+    if row is None:
+        raise Http404
+    return spec.render(row, selected)
+
+
+@api_view()
+def posts(request):
+    queryset = Post.objects.all()
+    if 'author' in request.GET:
+        author = get_object_or_404(User, username=request.GET['author'])
+        queryset = queryset.filter(author=author)
+    if 'group' in request.GET:
+        group = get_object_or_404(Group, slug=request.GET['group'])
+        queryset = queryset.filter(group=group)
+    return _list(request, queryset, fields.POST, 'pub_date')
+
+
+@api_view()
+def post_detail(request, post_id):
+    return _detail(request, Post.objects.filter(pk=post_id), fields.POST)
+
+
+@api_view()
+def post_comments(request, post_id):
+    return _list(
+        request, Comment.objects.filter(post_id=post_id), fields.COMMENT,
+        'created',
+    )
+
+
+@api_view()
+def comments(request):
+    # Без ?ids= пришлось бы читать все комментарии подряд.
+    if 'ids' not in request.GET:
+        raise BadRequest('Укажите ids или используйте /posts/<id>/comments/')
+    return _list(request, Comment.objects.all(), fields.COMMENT, 'created')
+
+
+@api_view()
+def groups(request):
+    # У групп нет даты, поэтому страницы идут по ключу, от новых к старым.
+    return _list(request, Group.objects.all(), fields.GROUP, None)
+
+
+@api_view()
+def group_detail(request, slug):
+    return _detail(request, Group.objects.filter(slug=slug), fields.GROUP)
+
+
+@api_view()
+def user_detail(request, username):
+    return _detail(
+        request, User.objects.filter(username=username), fields.USER)
+
+
+@api_view(login_required=True)
+def feed(request):
+    """Лента подписок текущего пользователя."""
+    return _list(
+        request, request.user.timeline.all(), fields.POST, 'pub_date',
+        pk_field='post_id', prefix='post__',
+    )
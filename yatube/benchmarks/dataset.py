@@ -0,0 +1,50 @@
+"""Набор данных для замеров и объекты, на которые ссылаются сценарии.
+
+Данные создаёт тот же генератор, что и manage.py seed_data, только в
+небольшом объёме и без картинок. При одном и том же `seed` и `scale`
+получается одна и та же база, поэтому замеры разных прогонов сравнимы.
+"""
+from django.db.models import Count
+from django.utils import timezone
+
+from posts.models import Follow, Group, Post, User
+
+from .seeding import Seeder
+
+
+class Dataset:
+    def __init__(self, author, reader, other, group, post):
+        # Самый плодовитый автор.
+        self.author = author
+        # Читатель с самой большой лентой подписок.
+        self.reader = reader
+        # Пользователь, на которого reader не подписан.
+        self.other = other
+        self.group = group
+        self.post = post
+
+
+def build(scale=1, seed=0):
+    """Создаёт набор данных; `scale` пропорционально меняет его размер."""
+    Seeder(
+        users=100 * scale,
+        posts=1000 * scale,
+        comments=3000 * scale,
+        follows=1000 * scale,
+        groups=10 * scale,
+        until=timezone.now(),
+        images=0,
+        seed=seed,
+        prefix='bench',
+    ).run()
+    author = User.objects.order_by('-stats__posts_count', 'pk').first()
+    reader = User.objects.order_by('-stats__following_count', 'pk').first()
+    other = User.objects.exclude(pk=reader.pk).exclude(
+        pk__in=Follow.objects.filter(user=reader).values('author_id')
+    ).order_by('-pk').first()
+    post = Post.objects.filter(
+        author=author, comments_count__gt=0
+    ).exclude(group=None).first()
+    group = Group.objects.annotate(
+        posts=Count('group_posts')).order_by('-posts', 'pk').first()
+    return Dataset(author, reader, other, group, post)
@@ -0,0 +1,107 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (setup_test_environment,
+                               teardown_test_environment)
+
+from benchmarks import dataset, runner
+from benchmarks.scenarios import SCENARIOS, URLCONFS
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время ответа и число SQL-запросов всех страниц на '
+        'тестовой базе и сравнивает с базовыми замерами. Завершается '
+        'с ошибкой, если какая-то страница стала медленнее.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Сколько раз замерять каждый сценарий')
+        parser.add_argument(
+            '--warmup', type=int, default=2,
+            help='Сколько запросов сделать до замера')
+        parser.add_argument(
+            '--scale', type=int, default=1,
+            help='Множитель размера тестовых данных')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--threshold', type=float, default=settings.BENCHMARK_THRESHOLD,
+            help='Допустимый относительный рост p95, например 0.25')
+        parser.add_argument(
+            '--min-delta', type=float, default=settings.BENCHMARK_MIN_DELTA_MS,
+            help='Рост p95 меньше этого числа миллисекунд не считается')
+        parser.add_argument(
+            '--baseline', default=settings.BENCHMARK_BASELINE,
+            help='Файл с базовыми замерами')
+        parser.add_argument(
+            '--update-baseline', action='store_true',
+            help='Записать результаты в файл базовых замеров')
+        parser.add_argument(
+            '--only', action='append', default=[],
+            help='Замерять только сценарии с этим именем URL')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1 or options['scale'] < 1:
+            raise CommandError('--repeat и --scale должны быть больше нуля')
+        missing = runner.uncovered(SCENARIOS, URLCONFS)
+        if missing:
+            raise CommandError(
+                'Нет сценариев для URL: ' + ', '.join(missing))
+        scenarios = [
+            scenario for scenario in SCENARIOS
+            if not options['only'] or scenario.url_name in options['only']
+        ]
+
+        results = self.measure(scenarios, options)
+        self.report(results, options)
+
+        if options['update_baseline']:
+            runner.save_baseline(
+                options['baseline'], results,
+                repeat=options['repeat'], scale=options['scale'],
+                seed=options['seed'],
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'Базовые замеры записаны в {options["baseline"]}'))
+            return
+        if not os.path.exists(options['baseline']):
+            raise CommandError(
+                f'Нет файла {options["baseline"]}; создайте его с '
+                '--update-baseline')
+        regressions = runner.compare(
+            results, runner.load_baseline(options['baseline']),
+            options['threshold'], options['min_delta'],
+        )
+        if regressions:
+            raise CommandError(
+                'Регрессии производительности:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Регрессий нет'))
+
+    def measure(self, scenarios, options):
+        # Замеры идут на отдельной тестовой базе, как в manage.py test.
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False)
+        try:
+            data = dataset.build(scale=options['scale'], seed=options['seed'])
+            return runner.run(
+                scenarios, data, options['repeat'], options['warmup'])
+        except runner.BenchmarkError as error:
+            raise CommandError(error)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def report(self, results, options):
+        width = max(len(name) for name in results)
+        self.stdout.write(
+            f'{"Сценарий":<{width}}  {"p50, мс":>9}  {"p95, мс":>9}  '
+            f'{"запросов":>8}')
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<{width}}  {result["p50_ms"]:>9.2f}  '
+                f'{result["p95_ms"]:>9.2f}  {result["queries"]:>8}')
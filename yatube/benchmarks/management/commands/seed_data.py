@@ -0,0 +1,84 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+from django.utils import timezone
+
+from benchmarks.seeding import PASSWORD, Seeder
+
+
+def _date(value):
+    try:
+        return timezone.make_aware(datetime.strptime(value, '%Y-%m-%d'))
+    except ValueError:
+        raise CommandError(f'Неверная дата {value!r}, нужен формат ГГГГ-ММ-ДД')
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, постами, '
+        'комментариями и подписками. При одинаковых параметрах и --seed '
+        'данные получаются одинаковыми.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument(
+            '--comments', type=int, default=300000,
+            help='Примерное общее число комментариев')
+        parser.add_argument(
+            '--follows', type=int, default=200000,
+            help='Примерное общее число подписок')
+        parser.add_argument('--groups', type=int, default=100)
+        parser.add_argument(
+            '--images', type=float, default=0.1,
+            help='Доля постов с картинками')
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней до --until распределены посты')
+        parser.add_argument(
+            '--until', type=_date,
+            help='Дата самого нового поста, ГГГГ-ММ-ДД; по умолчанию сейчас')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--prefix', default='seed',
+            help='Начало имён пользователей и slug групп')
+        parser.add_argument(
+            '--batch-size', type=int,
+            help='Сколько объектов создавать в одной транзакции')
+
+    def handle(self, *args, **options):
+        for name in ('users', 'posts', 'days'):
+            if options[name] < 1:
+                raise CommandError(f'--{name} должен быть больше нуля')
+        if not 0 <= options['images'] <= 1:
+            raise CommandError('--images должен быть от 0 до 1')
+        seeder = Seeder(
+            users=options['users'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows=options['follows'],
+            groups=options['groups'],
+            images=options['images'],
+            days=options['days'],
+            until=options['until'] or timezone.now(),
+            seed=options['seed'],
+            prefix=options['prefix'],
+            batch_size=options['batch_size'],
+            log=self.stdout.write,
+        )
+        started = time.monotonic()
+        try:
+            created = seeder.run()
+        except IntegrityError as error:
+            raise CommandError(
+                f'{error}. Возможно, данные с префиксом '
+                f'{options["prefix"]!r} уже есть; задайте другой --prefix')
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано за {elapsed:.0f} с: пользователей {created["users"]}, '
+            f'постов {created["posts"]}, комментариев {created["comments"]}, '
+            f'подписок {created["follows"]}. Пароль пользователей: {PASSWORD}'
+        ))
@@ -0,0 +1,135 @@
+"""Прогон сценариев и сравнение с базовыми замерами.
+
+Каждый сценарий выполняется `repeat` раз тестовым клиентом после
+`warmup` прогревочных запросов. Перед каждым запросом кэш очищается,
+поэтому замер показывает полную отрисовку страницы, а не чтение из кэша.
+Для сценария сохраняются медиана и 95-й перцентиль времени ответа и
+наибольшее число SQL-запросов.
+"""
+import json
+import math
+import time
+from importlib import import_module
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, reverse
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def percentile(values, percent):
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def url_names(urlconf):
+    """Полные имена URL модуля, например posts:index."""
+    module = import_module(urlconf)
+    namespace = getattr(module, 'app_name', None)
+    names = []
+    for pattern in module.urlpatterns:
+        if isinstance(pattern, URLPattern) and pattern.name:
+            names.append(
+                f'{namespace}:{pattern.name}' if namespace else pattern.name)
+        elif isinstance(pattern, URLResolver):
+            raise BenchmarkError(f'Вложенные URL в {urlconf} не поддержаны')
+    return names
+
+
+def uncovered(scenarios, urlconfs):
+    """Имена URL, для которых нет ни одного сценария."""
+    covered = {scenario.url_name for scenario in scenarios}
+    return [
+        name for urlconf in urlconfs for name in url_names(urlconf)
+        if name not in covered
+    ]
+
+
+def _request(scenario, dataset, iteration):
+    client = Client()
+    if scenario.user:
+        client.force_login(getattr(dataset, scenario.user))
+    if scenario.prepare:
+        scenario.prepare(dataset)
+    cache.clear()
+    url = reverse(scenario.url_name, kwargs=scenario.get_kwargs(dataset))
+    data = scenario.get_data(dataset, iteration)
+    send = getattr(client, scenario.method)
+
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        response = send(url, data)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        elapsed = time.perf_counter() - started
+    if response.status_code >= 400:
+        raise BenchmarkError(
+            f'{scenario.name}: ответ {response.status_code} на {url}')
+    return elapsed * 1000, len(queries)
+
+
+def measure(scenario, dataset, repeat, warmup=0):
+    for iteration in range(warmup):
+        _request(scenario, dataset, -iteration - 1)
+    timings, queries = [], []
+    for iteration in range(repeat):
+        elapsed, count = _request(scenario, dataset, iteration)
+        timings.append(elapsed)
+        queries.append(count)
+    return {
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'queries': max(queries),
+    }
+
+
+def run(scenarios, dataset, repeat, warmup=0):
+    return {
+        scenario.name: measure(scenario, dataset, repeat, warmup)
+        for scenario in scenarios
+    }
+
+
+def compare(results, baseline, threshold, min_delta_ms=0):
+    """Список регрессий относительно базовых замеров.
+
+    Регрессия — рост числа запросов или рост p95 больше чем в
+    1 + threshold раз и больше чем на min_delta_ms: разница в доли
+    миллисекунды на быстрых страницах — это шум, а не регрессия.
+    Сценарии без базового замера не сравниваются.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['queries'] > base['queries']:
+            regressions.append(
+                f'{name}: запросов {base["queries"]} -> {result["queries"]}')
+        limit = max(
+            base['p95_ms'] * (1 + threshold), base['p95_ms'] + min_delta_ms)
+        if result['p95_ms'] > limit:
+            regressions.append(
+                f'{name}: p95 {base["p95_ms"]} -> {result["p95_ms"]} мс')
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)['results']
+
+
+def save_baseline(path, results, **options):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(
+            {'options': options, 'results': results}, file,
+            ensure_ascii=False, indent=2, sort_keys=True,
+        )
+        file.write('\n')
@@ -0,0 +1,117 @@
+"""Сценарии замеров: по одному или несколько на каждый URL приложений.
+
+Сценарий описывает один запрос тестового клиента: имя URL, параметры,
+метод, пользователя и данные формы. `prepare` выполняется перед каждым
+повтором и в замер не входит; им сценарий возвращает базу в исходное
+состояние, например снимает подписку перед замером подписки.
+"""
+from posts.models import Follow
+
+from .seeding import PASSWORD
+
+# Приложения, все URL которых должны быть покрыты сценариями.
+URLCONFS = ('posts.urls', 'users.urls', 'about.urls')
+
+
+class Scenario:
+    def __init__(self, url_name, kwargs=None, query=None, method='get',
+                 user=None, data=None, prepare=None, suffix=''):
+        self.url_name = url_name
+        self.kwargs = kwargs
+        self.query = query
+        self.method = method
+        # Атрибут Dataset с пользователем или None для анонима.
+        self.user = user
+        self.data = data
+        self.prepare = prepare
+        self.name = url_name
+        if method != 'get':
+            self.name += f' [{method.upper()}]'
+        if suffix:
+            self.name += f' {suffix}'
+
+    def get_kwargs(self, dataset):
+        return self.kwargs(dataset) if self.kwargs else {}
+
+    def get_data(self, dataset, iteration):
+        if self.data:
+            return self.data(dataset, iteration)
+        return self.query or {}
+
+
+def _follow_off(dataset):
+    Follow.objects.filter(user=dataset.reader, author=dataset.other).delete()
+
+
+def _follow_on(dataset):
+    Follow.objects.get_or_create(user=dataset.reader, author=dataset.other)
+
+
+def _author(dataset):
+    return {'username': dataset.author.username}
+
+
+def _other(dataset):
+    return {'username': dataset.other.username}
+
+
+def _post(dataset):
+    return {'post_id': dataset.post.pk}
+
+
+def _post_form(dataset, iteration):
+    return {'text': f'Пост для замера {iteration}', 'group': dataset.group.pk}
+
+
+SCENARIOS = [
+    Scenario('posts:index'),
+    Scenario('posts:index', user='reader', suffix='(авторизован)'),
+    Scenario(
+        'posts:group_list', kwargs=lambda dataset: {
+            'slug': dataset.group.slug}),
+    Scenario('posts:profile', kwargs=_author),
+    Scenario('posts:search', query={'q': 'дневник море'}),
+    Scenario('posts:post_detail', kwargs=_post),
+    Scenario('posts:post_create', user='author'),
+    Scenario(
+        'posts:post_create', method='post', user='author', data=_post_form),
+    Scenario('posts:post_edit', kwargs=_post, user='author'),
+    Scenario(
+        'posts:post_edit', kwargs=_post, method='post', user='author',
+        data=_post_form),
+    Scenario(
+        'posts:add_comment', kwargs=_post, method='post', user='reader',
+        data=lambda dataset, iteration: {'text': f'Комментарий {iteration}'}),
+    Scenario('posts:follow_index', user='reader'),
+    Scenario('posts:export_posts', user='author'),
+    Scenario(
+        'posts:profile_follow', kwargs=_other, user='reader',
+        prepare=_follow_off),
+    Scenario(
+        'posts:profile_unfollow', kwargs=_other, user='reader',
+        prepare=_follow_on),
+    Scenario('users:signup'),
+    Scenario(
+        'users:signup', method='post',
+        data=lambda dataset, iteration: {
+            'username': f'signup{iteration}',
+            'email': f'signup{iteration}@example.com',
+            'password1': PASSWORD,
+            'password2': PASSWORD,
+        }),
+    Scenario('users:login'),
+    Scenario(
+        'users:login', method='post',
+        data=lambda dataset, iteration: {
+            'username': dataset.reader.username, 'password': PASSWORD}),
+    Scenario('users:logout', user='reader'),
+    Scenario('users:password_reset_form'),
+    Scenario(
+        'users:password_reset_form', method='post',
+        data=lambda dataset, iteration: {'email': dataset.reader.email}),
+    Scenario('users:password_reset_done'),
+    Scenario('users:password_change_form', user='reader'),
+    Scenario('users:password_change_done', user='reader'),
+    Scenario('about:author'),
+    Scenario('about:tech'),
+]
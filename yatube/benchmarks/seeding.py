@@ -0,0 +1,329 @@
+"""Генератор больших синтетических наборов данных.
+
+Данные похожи на живые: популярность пользователей распределена по
+закону Ципфа, поэтому несколько «звёзд» пишут заметную долю постов и
+собирают большинство подписчиков, а число подписок и комментариев у
+большинства мало, но с длинным хвостом. Всё, кроме абсолютных дат,
+определяется `seed`: даты отсчитываются от `until`.
+
+Объекты создаются bulk_create порциями, каждая — в своей транзакции, с
+заранее назначенными ключами. Сигналы при этом не срабатывают, поэтому
+счётчики, поисковый индекс и ленты подписок заполняются генератором сразу.
+"""
+import heapq
+import io
+import random
+from array import array
+from bisect import bisect
+from collections import defaultdict
+from datetime import timedelta
+from itertools import accumulate, islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from PIL import Image
+
+from posts import search
+from posts.bulk import keep_dates
+from posts.models import (Comment, Follow, Group, Post, TimelineEntry, User,
+                          UserStats)
+
+PASSWORD = 'seed-password'
+
+WORDS = (
+    'дневник утро город дорога книга лето море письмо вечер друг '
+    'работа проект поезд музыка кофе дождь снег прогулка кино лес'
+).split()
+
+# Сколько разных картинок создаётся для постов с картинками.
+IMAGE_POOL = 20
+
+
+def _first_pk(model):
+    return (model.objects.aggregate(Max('pk'))['pk__max'] or 0) + 1
+
+
+def _reset_sequences(*models):
+    """Передвигает последовательности ключей за последний ключ таблиц.
+
+    Нужно после bulk_create с заданными вручную ключами в базах с
+    последовательностями (PostgreSQL); в SQLite ничего не делает.
+    """
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+def _zipf(count, exponent=1.0):
+    """Накопленные веса рангов 1..count для random.choices."""
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+class Seeder:
+    def __init__(self, users, posts, comments, follows, groups, until,
+                 images=0.1, days=365, seed=0, prefix='seed',
+                 batch_size=None, log=None):
+        self.users = users
+        self.posts = posts
+        # Средние числа комментариев на пост и подписок на пользователя.
+        self.comments_per_post = comments / posts if posts else 0
+        self.follows_per_user = follows / users if users else 0
+        self.groups = groups
+        self.images = images
+        self.until = until
+        self.span = timedelta(days=days)
+        self.rng = random.Random(seed)
+        self.prefix = prefix
+        self.batch_size = batch_size or settings.SEED_BATCH_SIZE
+        self.log = log or (lambda message: None)
+        self.popularity = _zipf(users)
+        self.posts_count = [0] * users
+        self.followers_count = [0] * users
+        self.following_count = [0] * users
+        # Номера последних постов авторов — всё, что нужно лентам.
+        self.recent = defaultdict(lambda: array('l'))
+        self.created = dict.fromkeys(
+            ('users', 'posts', 'comments', 'follows'), 0)
+
+    def run(self):
+        self.first_user = _first_pk(User)
+        self.first_group = _first_pk(Group)
+        self.first_post = _first_pk(Post)
+        self.first_comment = _first_pk(Comment)
+        if connection.vendor == 'sqlite':
+            # Индексы ленты растут вразнобой; с кэшем SQLite по умолчанию
+            # (2 МБ) вставка упирается в чтение страниц с диска.
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA cache_size = -262144')
+        self.create_users()
+        self.create_groups()
+        self.image_names = self.create_images()
+        self.create_posts()
+        self.create_follows()
+        self.create_stats()
+        _reset_sequences(User, Group, Post, Comment, Follow, TimelineEntry)
+        return self.created
+
+    def user_pk(self, index):
+        return self.first_user + index
+
+    def popular_user(self):
+        """Индекс пользователя, выбранного с учётом популярности."""
+        return bisect(
+            self.popularity, self.rng.random() * self.popularity[-1])
+
+    def post_date(self, index):
+        # Посты равномерно распределены по времени в порядке ключей.
+        return self.until - self.span * (1 - (index + 1) / self.posts)
+
+    def text(self, low, high):
+        words = self.rng.randint(low, high)
+        return ' '.join(
+            self.rng.choice(WORDS) for _ in range(words)).capitalize()
+
+    def long_tail(self, mean):
+        """Неотрицательное целое со средним около mean и длинным хвостом."""
+        # Среднее распределения Парето с alpha = 1.5 равно 3.
+        return round(self.rng.paretovariate(1.5) * mean / 3)
+
+    def batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield range(start, min(start + self.batch_size, total))
+
+    def create_users(self):
+        password = make_password(PASSWORD)
+        for batch in self.batches(self.users):
+            User.objects.bulk_create([
+                User(
+                    pk=self.user_pk(index),
+                    username=f'{self.prefix}{self.user_pk(index)}',
+                    email=f'{self.prefix}{self.user_pk(index)}@example.com',
+                    password=password,
+                    date_joined=self.until - self.span,
+                )
+                for index in batch
+            ])
+            self.created['users'] += len(batch)
+            self.log(f'Пользователей: {self.created["users"]}')
+
+    def create_groups(self):
+        Group.objects.bulk_create([
+            Group(
+                pk=pk,
+                title=f'Группа {pk}',
+                slug=f'{self.prefix}-group-{pk}',
+                description=self.text(5, 20),
+            )
+            for pk in range(self.first_group, self.first_group + self.groups)
+        ])
+        self.group_weights = _zipf(self.groups)
+
+    def create_images(self):
+        """Небольшой набор картинок, общий для всех постов с картинками."""
+        if not self.images:
+            return []
+        names = []
+        for number in range(IMAGE_POOL):
+            name = f'posts/{self.prefix}-{number}.jpg'
+            color = tuple(self.rng.randrange(256) for _ in range(3))
+            size = (self.rng.randint(320, 1600), self.rng.randint(240, 1200))
+            if not default_storage.exists(name):
+                data = io.BytesIO()
+                Image.new('RGB', size, color).save(data, 'JPEG')
+                name = default_storage.save(name, ContentFile(data.getvalue()))
+            names.append(name)
+        return names
+
+    def make_post(self, index):
+        author = self.popular_user()
+        self.posts_count[author] += 1
+        group = None
+        if self.groups and self.rng.random() < 0.7:
+            group = self.first_group + self.rng.choices(
+                range(self.groups), cum_weights=self.group_weights)[0]
+        image = ''
+        if self.image_names and self.rng.random() < self.images:
+            image = self.rng.choice(self.image_names)
+        recent = self.recent[author]
+        recent.append(index)
+        if len(recent) > 2 * settings.TIMELINE_LENGTH:
+            del recent[:-settings.TIMELINE_LENGTH]
+        return Post(
+            pk=self.first_post + index,
+            author_id=self.user_pk(author),
+            group_id=group,
+            text=self.text(5, 80),
+            image=image,
+            pub_date=self.post_date(index),
+        )
+
+    def make_comments(self, post):
+        comments = []
+        for _ in range(self.long_tail(self.comments_per_post)):
+            created = post.pub_date + timedelta(
+                seconds=self.rng.randint(1, 2 * 24 * 3600))
+            comments.append(Comment(
+                pk=self.first_comment + self.created['comments'],
+                post_id=post.pk,
+                author_id=self.user_pk(self.rng.randrange(self.users)),
+                text=self.text(3, 30),
+                created=min(created, self.until),
+            ))
+            self.created['comments'] += 1
+        post.comments_count = len(comments)
+        return comments
+
+    def create_posts(self):
+        fields = (
+            Post._meta.get_field('pub_date'),
+            Comment._meta.get_field('created'),
+        )
+        for batch in self.batches(self.posts):
+            posts = [self.make_post(index) for index in batch]
+            comments = [
+                comment for post in posts
+                for comment in self.make_comments(post)
+            ]
+            with transaction.atomic(), keep_dates(*fields):
+                Post.objects.bulk_create(posts)
+                Comment.objects.bulk_create(comments)
+                search.index_posts(posts)
+                search.index_comments(comments)
+            self.created['posts'] += len(posts)
+            self.log(
+                f'Постов: {self.created["posts"]}, '
+                f'комментариев: {self.created["comments"]}'
+            )
+
+    def follow_targets(self, index):
+        """Авторы, на которых подписан пользователь index."""
+        wanted = min(self.long_tail(self.follows_per_user), self.users - 1)
+        targets = set()
+        # Популярных авторов выбирают чаще, поэтому повторы неизбежны;
+        # число попыток ограничено, чтобы не крутиться на малых базах.
+        for _ in range(wanted * 3):
+            if len(targets) >= wanted:
+                break
+            author = self.popular_user()
+            if author != index:
+                targets.add(author)
+        return sorted(targets)
+
+    def create_follows(self):
+        """Создаёт подписки и сразу заполняет ленты подписчиков."""
+        entries = []
+        for batch in self.batches(self.users):
+            follows = []
+            for index in batch:
+                authors = self.follow_targets(index)
+                for author in authors:
+                    follows.append(Follow(
+                        user_id=self.user_pk(index),
+                        author_id=self.user_pk(author),
+                    ))
+                    self.followers_count[author] += 1
+                self.following_count[index] = len(authors)
+                entries += self.timeline(index, authors)
+                if len(entries) >= self.batch_size:
+                    self.insert_timeline(entries)
+                    entries = []
+            Follow.objects.bulk_create(follows)
+            self.created['follows'] += len(follows)
+            self.log(f'Подписок: {self.created["follows"]}')
+        self.insert_timeline(entries)
+
+    def timeline(self, index, authors):
+        """Строки ленты пользователя: последние посты его авторов.
+
+        Ключи постов растут вместе с датой, поэтому лента — слияние
+        убывающих списков последних постов авторов, без сортировки.
+        """
+        latest = heapq.merge(
+            *(
+                reversed(self.recent[author][-settings.TIMELINE_LENGTH:])
+                for author in authors if author in self.recent
+            ),
+            reverse=True,
+        )
+        user_pk = self.user_pk(index)
+        return [
+            (user_pk, post_index)
+            for post_index in islice(latest, settings.TIMELINE_LENGTH)
+        ]
+
+    def insert_timeline(self, entries):
+        # Лента — самая большая таблица набора, поэтому строки вставляются
+        # executemany без создания объектов модели; дата берётся из поста.
+        if not entries:
+            return
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {TimelineEntry._meta.db_table} '
+                '(user_id, post_id, pub_date) '
+                f'SELECT %s, id, pub_date FROM {Post._meta.db_table} '
+                'WHERE id = %s',
+                [
+                    (user_pk, self.first_post + post_index)
+                    for user_pk, post_index in entries
+                ],
+            )
+
+    def create_stats(self):
+        for batch in self.batches(self.users):
+            UserStats.objects.bulk_create([
+                UserStats(
+                    user_id=self.user_pk(index),
+                    posts_count=self.posts_count[index],
+                    followers_count=self.followers_count[index],
+                    following_count=self.following_count[index],
+                )
+                for index in batch
+            ])
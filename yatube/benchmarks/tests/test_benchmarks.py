@@ -0,0 +1,41 @@
+from django.test import TestCase
+
+from .. import dataset, runner
+from ..scenarios import SCENARIOS, URLCONFS
+
+
+class RunnerTests(TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(runner.percentile(values, 50), 50)
+        self.assertEqual(runner.percentile(values, 95), 95)
+        self.assertEqual(runner.percentile([7], 95), 7)
+
+    def test_compare(self):
+        baseline = {
+            'posts:index': {'p50_ms': 5, 'p95_ms': 10, 'queries': 3},
+            'about:tech': {'p50_ms': 1, 'p95_ms': 1, 'queries': 0},
+        }
+        results = {
+            'posts:index': {'p50_ms': 9, 'p95_ms': 20, 'queries': 4},
+            'about:tech': {'p50_ms': 1, 'p95_ms': 3, 'queries': 0},
+            'posts:search': {'p50_ms': 50, 'p95_ms': 90, 'queries': 9},
+        }
+        regressions = runner.compare(
+            results, baseline, threshold=0.5, min_delta_ms=5)
+        self.assertEqual(regressions, [
+            'posts:index: запросов 3 -> 4',
+            'posts:index: p95 10 -> 20 мс',
+        ])
+
+    def test_every_url_has_scenario(self):
+        self.assertEqual(runner.uncovered(SCENARIOS, URLCONFS), [])
+        self.assertIn('posts:index', runner.url_names('posts.urls'))
+
+    def test_scenarios_run(self):
+        data = dataset.build()
+        results = runner.run(SCENARIOS, data, repeat=1)
+        self.assertEqual(
+            set(results), {scenario.name for scenario in SCENARIOS})
+        self.assertEqual(results['about:tech']['queries'], 0)
+        self.assertGreater(results['posts:follow_index']['queries'], 0)
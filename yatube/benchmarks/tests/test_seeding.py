@@ -0,0 +1,93 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from posts.counters import recount_all
+from posts.models import Follow, Post, TimelineEntry, User, UserStats
+
+from ..seeding import Seeder
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, TIMELINE_LENGTH=20)
+class SeederTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def seed(self, prefix, seed=0):
+        seeder = Seeder(
+            users=30, posts=300, comments=600, follows=150, groups=3,
+            images=0.2, until=timezone.now(), seed=seed, prefix=prefix,
+            batch_size=50,
+        )
+        seeder.run()
+        return [
+            (
+                post.author_id - seeder.first_user,
+                post.group_id and post.group_id - seeder.first_group,
+                post.text,
+                post.comments_count,
+            )
+            for post in Post.objects.filter(
+                author__username__startswith=prefix).order_by('pk')
+        ]
+
+    def test_same_seed_gives_same_data(self):
+        first = self.seed('first')
+        self.assertEqual(len(first), 300)
+        self.assertEqual(self.seed('second'), first)
+        self.assertNotEqual(self.seed('third', seed=1), first)
+
+    def test_counters_and_timelines_are_consistent(self):
+        self.seed('seed')
+        stats = list(UserStats.objects.order_by('pk').values_list())
+        comments = list(
+            Post.objects.order_by('pk').values_list('comments_count'))
+        recount_all()
+        self.assertEqual(
+            list(UserStats.objects.order_by('pk').values_list()), stats)
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('comments_count')),
+            comments,
+        )
+        self.assertTrue(Post.objects.exclude(image='').exists())
+        for user in User.objects.all():
+            expected = list(
+                Post.objects.filter(
+                    author__in=Follow.objects.filter(
+                        user=user).values('author_id')
+                ).values_list('pk', 'pub_date')[:20]
+            )
+            entries = list(
+                TimelineEntry.objects.filter(user=user)
+                .order_by('-pub_date', '-post_id')
+                .values_list('post_id', 'pub_date')
+            )
+            self.assertEqual(entries, expected)
+
+    def test_popular_authors_dominate(self):
+        self.seed('seed')
+        stats = UserStats.objects.order_by('-followers_count')
+        top = stats.first()
+        self.assertGreater(
+            top.followers_count, 3 * stats[len(stats) // 2].followers_count)
+        self.assertGreater(
+            max(stats.values_list('posts_count', flat=True)), 300 / 30 * 2)
+
+    def test_command(self):
+        out = StringIO()
+        call_command(
+            'seed_data', users=10, posts=50, comments=100, follows=20,
+            groups=2, images=0, stdout=out,
+        )
+        self.assertEqual(User.objects.count(), 10)
+        self.assertEqual(Post.objects.count(), 50)
+        self.assertIn('Создано', out.getvalue())
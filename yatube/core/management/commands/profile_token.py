@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.profiling import make_token
+
+
+class Command(BaseCommand):
+    help = (
+        'Выдаёт токен для заголовка X-Profile: запрос с ним профилируется. '
+        'Режим задаётся заголовком X-Profile-Mode: cprofile или sample.'
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(make_token())
+        self.stderr.write(
+            f'Токен действует {settings.PROFILING_TOKEN_MAX_AGE} с')
@@ -0,0 +1,82 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def log_files(path):
+    """Файл лога и его ротированные копии .1, .2 ... от старых к новым."""
+    rotated = []
+    number = 1
+    while os.path.exists(f'{path}.{number}'):
+        rotated.append(f'{path}.{number}')
+        number += 1
+    files = rotated[::-1]
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def aggregate(lines, view=None):
+    """Сводит строки лога yatube.templates по шаблонам, тегам и фильтрам.
+
+    Возвращает число запросов и словарь
+    имя -> [вызовы, запросы, общее время, собственное время].
+    """
+    requests = 0
+    totals = {}
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if view and record.get('view') != view:
+            continue
+        requests += 1
+        for label, (calls, total, own) in record['templates'].items():
+            stats = totals.setdefault(label, [0, 0, 0.0, 0.0])
+            stats[0] += calls
+            stats[1] += 1
+            stats[2] += total
+            stats[3] += own
+    return requests, totals
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводка времени отрисовки по шаблонам, тегам и фильтрам из лога '
+        'замеренных запросов (TEMPLATE_PROFILE_LOG), по убыванию '
+        'собственного времени.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--log', default=settings.TEMPLATE_PROFILE_LOG,
+            help='Файл лога; ротированные копии читаются тоже.')
+        parser.add_argument(
+            '--view', help='Только запросы к этому view, например posts:index')
+        parser.add_argument(
+            '--limit', type=int, default=30, help='Сколько строк показать.')
+
+    def handle(self, *args, **options):
+        files = log_files(options['log'])
+        if not files:
+            raise CommandError(f'Лог {options["log"]} не найден')
+        lines = []
+        for path in files:
+            with open(path, encoding='utf-8') as file:
+                lines.extend(file)
+        requests, totals = aggregate(lines, options['view'])
+        if not requests:
+            raise CommandError('В логе нет подходящих запросов')
+        self.stdout.write(f'Запросов: {requests}')
+        self.stdout.write('{:<44} {:>8} {:>8} {:>11} {:>11} {:>10}'.format(
+            'Шаблон, тег, фильтр', 'вызовов', 'запросов', 'всего, мс',
+            'своё, мс', 'на запрос'))
+        ordered = sorted(
+            totals.items(), key=lambda item: item[1][3], reverse=True)
+        for label, (calls, seen, total, own) in ordered[:options['limit']]:
+            self.stdout.write(
+                '{:<44} {:>8} {:>8} {:>11.1f} {:>11.1f} {:>10.2f}'.format(
+                    label[:44], calls, seen, total, own, own / seen))
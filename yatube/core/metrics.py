@@ -0,0 +1,229 @@
+"""Метрики для Prometheus в текстовом формате.
+
+Счётчики и гистограммы живут в памяти процесса: обновление — сложение в
+словаре под блокировкой. Когда у сайта несколько рабочих процессов, каждый
+из них не чаще раза в METRICS_FLUSH_INTERVAL секунд записывает снимок своих
+метрик в METRICS_DIR, а /metrics складывает снимки всех процессов. Без
+METRICS_DIR отдаются метрики одного процесса.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+_lock = threading.Lock()
+_last_flush = 0.0
+
+REGISTRY = []
+
+
+def _label_value(value):
+    return (
+        str(value).replace('\\', r'\\').replace('\n', r'\n')
+        .replace('"', r'\"')
+    )
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    return '{{{}}}'.format(','.join(
+        f'{name}="{_label_value(value)}"'
+        for name, value in zip(names, values)
+    ))
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values = {}
+        REGISTRY.append(self)
+
+    def copy(self, value):
+        return value
+
+    def merge(self, total, value):
+        return value if total is None else total + value
+
+    def samples(self, labels, value):
+        yield _labels(self.labelnames, labels), value
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, *labels, amount=1):
+        with _lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+
+class Histogram(Metric):
+    """Гистограмма; значение — счётчики корзин, переполнение и сумма."""
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *labels, value):
+        index = bisect_left(self.buckets, value)
+        with _lock:
+            counts = self.values.get(labels)
+            if counts is None:
+                counts = self.values[labels] = [0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    def copy(self, value):
+        return list(value)
+
+    def merge(self, total, value):
+        if total is None:
+            return list(value)
+        return [left + right for left, right in zip(total, value)]
+
+    def samples(self, labels, value):
+        names = self.labelnames + ('le',)
+        count = 0
+        for bound, hits in zip(self.buckets + ('+Inf',), value):
+            count += hits
+            le = bound if bound == '+Inf' else format(bound, 'g')
+            yield '_bucket' + _labels(names, labels + (le,)), count
+        yield '_sum' + _labels(self.labelnames, labels), value[-1]
+        yield '_count' + _labels(self.labelnames, labels), count
+
+
+REQUEST_DURATION = Histogram(
+    'yatube_http_request_duration_seconds',
+    'Время ответа на HTTP-запрос по имени URL.',
+    ('view', 'method'),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUEST_QUERIES = Histogram(
+    'yatube_http_request_db_queries',
+    'Число SQL-запросов на один HTTP-запрос по имени URL.',
+    ('view',),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+CACHE_REQUESTS = Counter(
+    'yatube_cache_requests_total',
+    'Обращения к кэшу страниц (page) и карточек постов (card).',
+    ('cache', 'result'),
+)
+THUMBNAIL_DURATION = Histogram(
+    'yatube_thumbnail_generation_seconds',
+    'Время создания всех миниатюр одной картинки.',
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+
+def resident_memory():
+    """Занятая процессом физическая память в байтах или None."""
+    try:
+        with open('/proc/self/statm') as file:
+            pages = int(file.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE')
+
+
+def snapshot():
+    with _lock:
+        values = {
+            metric.name: [
+                [list(labels), metric.copy(value)]
+                for labels, value in metric.values.items()
+            ]
+            for metric in REGISTRY
+        }
+    return {'pid': os.getpid(), 'memory': resident_memory(), 'metrics': values}
+
+
+def _snapshot_path(pid):
+    return os.path.join(settings.METRICS_DIR, f'{pid}.json')
+
+
+def flush():
+    """Записывает снимок метрик процесса в METRICS_DIR."""
+    global _last_flush
+    _last_flush = time.monotonic()
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    path = _snapshot_path(os.getpid())
+    # Запись во временный файл и os.replace: читатель видит либо старый
+    # снимок, либо новый, но не половину.
+    temporary = f'{path}.{threading.get_ident()}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump(snapshot(), file)
+    os.replace(temporary, path)
+
+
+def maybe_flush():
+    if (
+        settings.METRICS_DIR
+        and time.monotonic() - _last_flush >= settings.METRICS_FLUSH_INTERVAL
+    ):
+        flush()
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def collect():
+    """Снимки метрик всех процессов сайта."""
+    if not settings.METRICS_DIR:
+        return [snapshot()]
+    flush()
+    snapshots = []
+    for name in os.listdir(settings.METRICS_DIR):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(settings.METRICS_DIR, name),
+                      encoding='utf-8') as file:
+                snapshots.append(json.load(file))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def render(snapshots):
+    """Метрики в текстовом формате Prometheus.
+
+    Счётчики и гистограммы складываются по всем снимкам, в том числе
+    завершившихся процессов, чтобы суммы не уменьшались. Память
+    показывается только для живых процессов.
+    """
+    lines = []
+    for metric in REGISTRY:
+        merged = {}
+        for data in snapshots:
+            for labels, value in data['metrics'].get(metric.name, ()):
+                labels = tuple(labels)
+                merged[labels] = metric.merge(merged.get(labels), value)
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.type}')
+        for labels in sorted(merged):
+            for suffix, value in metric.samples(labels, merged[labels]):
+                lines.append(f'{metric.name}{suffix} {value}')
+    name = 'yatube_process_resident_memory_bytes'
+    lines.append(f'# HELP {name} Физическая память рабочего процесса.')
+    lines.append(f'# TYPE {name} gauge')
+    for data in sorted(snapshots, key=lambda data: data['pid']):
+        if data['memory'] is not None and _alive(data['pid']):
+            lines.append(
+                f'{name}{_labels(("pid",), (data["pid"],))} {data["memory"]}')
+    return '\n'.join(lines) + '\n'
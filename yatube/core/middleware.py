@@ -0,0 +1,150 @@
+import json
+import logging
+import os
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics, profiling, slow_queries, timing
+
+logger = logging.getLogger('yatube.requests')
+template_logger = logging.getLogger('yatube.templates')
+
+
+def _server_timing(measured, total):
+    """Значение заголовка Server-Timing по замерам запроса."""
+    return ', '.join([
+        f'db;dur={measured.sql_time * 1000:.1f};'
+        f'desc="{measured.sql_count} queries"',
+        f'tpl;dur={measured.template_time * 1000:.1f}',
+        f'cache;desc="hits={measured.cache_hits} '
+        f'misses={measured.cache_misses}"',
+        f'total;dur={total * 1000:.1f}',
+    ])
+
+
+# Прочие методы попадают в метки как OTHER, чтобы клиент не мог
+# наплодить меток произвольными методами.
+HTTP_METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """Время ответа и число SQL-запросов каждого запроса для /metrics.
+
+    Стоит первым в MIDDLEWARE, чтобы время включало остальные middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryCounter()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(queries))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+        match = request.resolver_match
+        view = match.view_name if match else 'unmatched'
+        method = request.method if request.method in HTTP_METHODS else 'OTHER'
+        metrics.REQUEST_DURATION.observe(view, method, value=elapsed)
+        metrics.REQUEST_QUERIES.observe(view, value=queries.count)
+        metrics.maybe_flush()
+        return response
+
+
+class TimingMiddleware:
+    """Замеряет долю запросов REQUEST_TIMING_SAMPLE_RATE.
+
+    Для замеренного запроса в лог yatube.requests пишется строка JSON,
+    а сотрудникам при REQUEST_TIMING_HEADER те же числа отдаются в
+    заголовке Server-Timing.
+    Время отдельных шаблонов, тегов и фильтров уходит в лог
+    yatube.templates, который сводит manage.py template_report.
+    Незамеренный запрос проходит насквозь после одного random().
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.REQUEST_TIMING_SAMPLE_RATE
+        if not rate or random.random() >= rate:
+            return self.get_response(request)
+        with timing.measure() as measured:
+            started = time.perf_counter()
+            response = self.get_response(request)
+            total = time.perf_counter() - started
+        user = getattr(request, 'user', None)
+        if settings.REQUEST_TIMING_HEADER and user and user.is_staff:
+            response['Server-Timing'] = _server_timing(measured, total)
+        match = request.resolver_match
+        view = match.view_name if match else None
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            **measured.as_dict(),
+        }, ensure_ascii=False))
+        if measured.templates:
+            template_logger.info(json.dumps({
+                'time': round(time.time(), 3),
+                'view': view,
+                'templates': measured.templates_ms(),
+            }, ensure_ascii=False))
+        return response
+
+
+class ProfilingMiddleware:
+    """Профилирует view по запросу или для доли PROFILING_SAMPLE_RATE.
+
+    Стоит последним в MIDDLEWARE, чтобы в профиль попадал view, а не
+    остальные middleware, и чтобы request.user был уже известен.
+    Тому, кто заказал профиль, имя файла отдаётся в X-Profile-File.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = profiling.requested_mode(request)
+        requested = mode is not None
+        rate = settings.PROFILING_SAMPLE_RATE
+        if not requested and rate and random.random() < rate:
+            mode = settings.PROFILING_SAMPLE_MODE
+        if mode is None:
+            return self.get_response(request)
+        response, path = profiling.profile(request, self.get_response, mode)
+        if requested:
+            response['X-Profile-File'] = os.path.basename(path)
+        return response
+
+
+class SlowQueryMiddleware:
+    """Сообщает журналу медленных запросов, какой HTTP-запрос выполняется."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = slow_queries.current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            slow_queries.current_request.reset(token)
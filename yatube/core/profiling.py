@@ -0,0 +1,175 @@
+"""Профилирование отдельных запросов на живом сайте.
+
+Запрос профилируется, если:
+- в заголовке X-Profile передан токен из manage.py profile_token;
+- сотрудник добавил к адресу ?profile=1 (или ?profile=sample);
+- запрос попал в случайную выборку PROFILING_SAMPLE_RATE.
+
+Режим cprofile пишет файл .pstats (смотреть через pstats, snakeviz),
+режим sample — свёрнутые стеки .collapsed для flamegraph.pl и speedscope.
+В PROFILING_DIR хранится не больше PROFILING_MAX_FILES профилей, старые
+удаляются. Профилей по токену каждый процесс снимает не больше
+PROFILING_TOKEN_RATE в минуту, остальные запросы с токеном выполняются
+без профилировщика.
+"""
+import cProfile
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+MODES = ('cprofile', 'sample')
+TOKEN_SALT = 'yatube.profiling'
+TOKEN_HEADER = 'HTTP_X_PROFILE'
+MODE_HEADER = 'HTTP_X_PROFILE_MODE'
+
+_token_lock = threading.Lock()
+# Моменты профилей по токену за последнюю минуту
+_token_uses = deque()
+
+
+def make_token():
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign('profile')
+
+
+def check_token(token):
+    try:
+        signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+            token, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def _token_allowed():
+    now = time.monotonic()
+    with _token_lock:
+        while _token_uses and now - _token_uses[0] >= 60:
+            _token_uses.popleft()
+        if len(_token_uses) >= settings.PROFILING_TOKEN_RATE:
+            return False
+        _token_uses.append(now)
+    return True
+
+
+def _mode(value):
+    return value if value in MODES else 'cprofile'
+
+
+def requested_mode(request):
+    """Режим профилирования, заказанный запросом, или None."""
+    token = request.META.get(TOKEN_HEADER)
+    if token and check_token(token):
+        if _token_allowed():
+            return _mode(request.META.get(MODE_HEADER))
+        logger.warning(
+            'Профиль %s по токену пропущен: больше %s в минуту',
+            request.path, settings.PROFILING_TOKEN_RATE)
+        return None
+    value = request.GET.get('profile')
+    user = getattr(request, 'user', None)
+    if value and user is not None and user.is_staff:
+        return _mode(value)
+    return None
+
+
+class StackSampler:
+    """Сэмплер стеков одного потока.
+
+    Фоновый поток раз в `interval` секунд снимает стек профилируемого
+    потока через sys._current_frames и считает одинаковые стеки.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = Counter()
+
+    def __enter__(self):
+        self.thread_id = threading.get_ident()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                name = os.path.basename(code.co_filename)
+                stack.append(f'{code.co_name} ({name}:{frame.f_lineno})')
+                frame = frame.f_back
+            if stack:
+                # В свёрнутом формате разделители — «;» и пробел.
+                self.stacks[';'.join(
+                    label.replace(';', ':').replace(' ', '_')
+                    for label in reversed(stack)
+                )] += 1
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f'{stack} {count}\n')
+
+
+def _path(request, extension):
+    match = request.resolver_match
+    view = match.view_name.replace(':', '.') if match else 'unknown'
+    name = '{}-{}-{}-{}.{}'.format(
+        timezone.now().strftime('%Y%m%d-%H%M%S'), view, os.getpid(),
+        uuid.uuid4().hex[:8], extension,
+    )
+    os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+    return os.path.join(settings.PROFILING_DIR, name)
+
+
+def prune():
+    """Удаляет самые старые профили сверх PROFILING_MAX_FILES."""
+    paths = []
+    for name in os.listdir(settings.PROFILING_DIR):
+        path = os.path.join(settings.PROFILING_DIR, name)
+        try:
+            paths.append((os.path.getmtime(path), path))
+        except OSError:
+            continue
+    paths.sort()
+    for _, path in paths[:max(len(paths) - settings.PROFILING_MAX_FILES, 0)]:
+        try:
+            os.remove(path)
+        except OSError:
+            # Файл уже удалил другой процесс.
+            continue
+
+
+def profile(request, get_response, mode):
+    """Выполняет get_response под профилировщиком и сохраняет результат.
+
+    Возвращает ответ и путь к файлу профиля.
+    """
+    if mode == 'sample':
+        with StackSampler(settings.PROFILING_SAMPLE_INTERVAL) as sampler:
+            response = get_response(request)
+        path = _path(request, 'collapsed')
+        sampler.dump(path)
+    else:
+        profiler = cProfile.Profile()
+        response = profiler.runcall(get_response, request)
+        path = _path(request, 'pstats')
+        profiler.dump_stats(path)
+    prune()
+    logger.info('Профиль %s сохранён в %s', request.path, path)
+    return response, path
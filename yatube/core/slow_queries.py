@@ -0,0 +1,108 @@
+"""Журнал медленных SQL-запросов.
+
+Обёртка выполнения запросов ставится на каждое соединение с базой и
+замеряет каждый запрос. Запрос дольше SLOW_QUERY_MS пишется в лог
+yatube.slow_queries одной строкой JSON: текст, параметры, view и адрес
+запроса, место вызова в коде проекта и план, снятый EXPLAIN сразу
+после медленного выполнения.
+"""
+import json
+import logging
+import os
+import sys
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger('yatube.slow_queries')
+
+# HTTP-запрос, в рамках которого выполняется SQL; ставит SlowQueryMiddleware.
+current_request = ContextVar('slow_query_request', default=None)
+# Во время EXPLAIN обёртка не должна замерять сам EXPLAIN.
+_explaining = ContextVar('slow_query_explaining', default=False)
+
+_THIS_FILE = os.path.abspath(__file__)
+
+
+def call_site():
+    """Ближайший к запросу кадр стека из кода проекта."""
+    frame = sys._getframe(1)
+    base_dir = settings.BASE_DIR + os.sep
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if (
+            filename.startswith(base_dir)
+            and filename != _THIS_FILE
+            and 'site-packages' not in filename
+        ):
+            return '{}:{} in {}'.format(
+                os.path.relpath(filename, settings.BASE_DIR),
+                frame.f_lineno, frame.f_code.co_name,
+            )
+        frame = frame.f_back
+    return None
+
+
+def explain(connection, sql, params):
+    """План запроса или None, если его не снять."""
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return None
+    token = _explaining.set(True)
+    try:
+        # Точка сохранения: в PostgreSQL упавший EXPLAIN иначе испортил
+        # бы всю текущую транзакцию.
+        with transaction.atomic(using=connection.alias), \
+                connection.cursor() as cursor:
+            cursor.execute(
+                f'{connection.ops.explain_query_prefix()} {sql}', params)
+            return [
+                ' '.join(str(column) for column in row)
+                for row in cursor.fetchall()
+            ]
+    except Exception as error:
+        return [f'EXPLAIN не удался: {error}']
+    finally:
+        _explaining.reset(token)
+
+
+def execute(execute, sql, params, many, context):
+    # executemany — пакет однотипных запросов; его общее время не говорит
+    # о медленном запросе, поэтому пакеты не замеряются.
+    if many or _explaining.get():
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    elapsed = (time.perf_counter() - started) * 1000
+    if elapsed >= settings.SLOW_QUERY_MS:
+        log(context['connection'], sql, params, elapsed)
+    return result
+
+
+def log(connection, sql, params, elapsed):
+    request = current_request.get()
+    match = request.resolver_match if request is not None else None
+    logger.warning(json.dumps({
+        'duration_ms': round(elapsed, 2),
+        'database': connection.alias,
+        'sql': sql,
+        'params': params if settings.SLOW_QUERY_PARAMS else None,
+        'view': match.view_name if match else None,
+        'path': request.path if request is not None else None,
+        'call_site': call_site(),
+        'plan': explain(connection, sql, params),
+    }, ensure_ascii=False, default=str))
+
+
+def install(sender, connection, **kwargs):
+    """Обработчик connection_created: ставит обёртку на соединение.
+
+    Обёртка встаёт первой в списке: execute_wrapper() снимает свою
+    обёртку с конца, и соединение, открытое внутри такого блока, не
+    должно сбить ему порядок.
+    """
+    if not settings.SLOW_QUERY_MS:
+        return
+    if execute not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, execute)
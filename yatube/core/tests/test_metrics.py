@@ -0,0 +1,131 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from .. import metrics
+
+User = get_user_model()
+
+TEMP_METRICS_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def sample(text, line):
+    """Значение строки метрики `line` из ответа /metrics."""
+    for row in text.splitlines():
+        name, _, value = row.rpartition(' ')
+        if name == line:
+            return float(value)
+    return None
+
+
+@override_settings(
+    METRICS_DIR=None, METRICS_TOKEN=None, METRICS_ALLOW_INTERNAL_IPS=True)
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author')
+        for number in range(3):
+            Post.objects.create(author=author, text=f'Пост {number}')
+
+    def setUp(self):
+        cache.clear()
+
+    def scrape(self, **extra):
+        response = self.client.get(reverse('metrics'), **extra)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_requests_and_cache(self):
+        before = self.scrape()
+        count = 'yatube_http_request_duration_seconds_count' \
+            '{view="posts:index",method="GET"}'
+        hits = 'yatube_cache_requests_total{cache="page",result="hit"}'
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        after = self.scrape()
+        self.assertEqual(
+            sample(after, count) - (sample(before, count) or 0), 2)
+        self.assertEqual(sample(after, hits) - (sample(before, hits) or 0), 1)
+        self.assertIn(
+            'yatube_http_request_db_queries_bucket'
+            '{view="posts:index",le="+Inf"}', after)
+        self.assertIn(
+            f'yatube_process_resident_memory_bytes{{pid="{os.getpid()}"}}',
+            after)
+        self.assertIn(
+            '# TYPE yatube_thumbnail_generation_seconds histogram', after)
+
+    def test_histogram(self):
+        histogram = metrics.Histogram(
+            'test_seconds', 'Тест.', ('view',), buckets=(1, 2))
+        metrics.REGISTRY.remove(histogram)
+        histogram.observe('a', value=1)
+        histogram.observe('a', value=1.5)
+        histogram.observe('a', value=3)
+        samples = dict(histogram.samples(('a',), histogram.values[('a',)]))
+        self.assertEqual(samples, {
+            '_bucket{view="a",le="1"}': 1,
+            '_bucket{view="a",le="2"}': 2,
+            '_bucket{view="a",le="+Inf"}': 3,
+            '_sum{view="a"}': 5.5,
+            '_count{view="a"}': 3,
+        })
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 403)
+        self.scrape(HTTP_AUTHORIZATION='Bearer secret')
+
+    def test_internal_ips_only(self):
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='10.1.2.3')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(METRICS_ALLOW_INTERNAL_IPS=False)
+    def test_closed_without_token(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(
+        METRICS_ALLOW_INTERNAL_IPS=False, METRICS_TOKEN='secret')
+    def test_token_from_any_address(self):
+        self.scrape(HTTP_AUTHORIZATION='Bearer secret', REMOTE_ADDR='10.1.2.3')
+
+
+@override_settings(
+    METRICS_DIR=TEMP_METRICS_DIR, METRICS_TOKEN=None,
+    METRICS_ALLOW_INTERNAL_IPS=True)
+class MultiprocessMetricsTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_METRICS_DIR, ignore_errors=True)
+
+    def test_snapshots_are_summed(self):
+        # Снимок другого, уже завершившегося рабочего процесса.
+        other = metrics.snapshot()
+        other['pid'] = 2 ** 22 + 1
+        other['metrics'] = {
+            'yatube_cache_requests_total': [[['card', 'miss'], 5]],
+        }
+        with open(os.path.join(TEMP_METRICS_DIR, 'other.json'), 'w') as file:
+            json.dump(other, file)
+        line = 'yatube_cache_requests_total{cache="card",result="miss"}'
+        own = dict(
+            (tuple(labels), value) for labels, value in
+            metrics.snapshot()['metrics']['yatube_cache_requests_total']
+        ).get(('card', 'miss'), 0)
+        text = self.client.get(reverse('metrics')).content.decode()
+        self.assertEqual(sample(text, line), own + 5)
+        self.assertTrue(os.path.exists(
+            os.path.join(TEMP_METRICS_DIR, f'{os.getpid()}.json')))
+        self.assertNotIn(f'pid="{other["pid"]}"', text)
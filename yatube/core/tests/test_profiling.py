@@ -0,0 +1,106 @@
+import os
+import pstats
+import shutil
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import profiling
+
+User = get_user_model()
+
+TEMP_PROFILING_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(PROFILING_DIR=TEMP_PROFILING_DIR, PROFILING_SAMPLE_RATE=0)
+class ProfilingTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_PROFILING_DIR, ignore_errors=True)
+
+    def setUp(self):
+        profiling._token_uses.clear()
+        self.staff = User.objects.create_user(username='staff', is_staff=True)
+        self.user = User.objects.create_user(username='user')
+        self.url = reverse('about:tech')
+
+    def profile_path(self, response):
+        return os.path.join(TEMP_PROFILING_DIR, response['X-Profile-File'])
+
+    def test_staff_query_parameter(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(self.url, {'profile': '1'})
+        self.assertEqual(response.status_code, 200)
+        path = self.profile_path(response)
+        self.assertTrue(path.endswith('.pstats'))
+        self.assertIn('about.tech', path)
+        self.assertTrue(pstats.Stats(path).total_calls)
+
+    def test_query_parameter_ignored_for_others(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.url, {'profile': '1'})
+        self.assertNotIn('X-Profile-File', response)
+        self.client.logout()
+        response = self.client.get(self.url, {'profile': '1'})
+        self.assertNotIn('X-Profile-File', response)
+
+    def test_signed_header(self):
+        response = self.client.get(
+            self.url, HTTP_X_PROFILE=profiling.make_token())
+        self.assertTrue(response['X-Profile-File'].endswith('.pstats'))
+        response = self.client.get(self.url, HTTP_X_PROFILE='forged')
+        self.assertNotIn('X-Profile-File', response)
+
+    @override_settings(PROFILING_TOKEN_RATE=2)
+    def test_token_rate_limit(self):
+        token = profiling.make_token()
+        for _ in range(2):
+            response = self.client.get(self.url, HTTP_X_PROFILE=token)
+            self.assertIn('X-Profile-File', response)
+        with self.assertLogs('core.profiling', 'WARNING'):
+            response = self.client.get(self.url, HTTP_X_PROFILE=token)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-File', response)
+
+    @override_settings(PROFILING_MAX_FILES=2)
+    def test_oldest_profiles_removed(self):
+        old = os.path.join(TEMP_PROFILING_DIR, 'old.pstats')
+        open(old, 'w').close()
+        os.utime(old, (0, 0))
+        self.client.force_login(self.staff)
+        for _ in range(2):
+            response = self.client.get(self.url, {'profile': '1'})
+        self.assertEqual(len(os.listdir(TEMP_PROFILING_DIR)), 2)
+        self.assertFalse(os.path.exists(old))
+        self.assertTrue(os.path.exists(self.profile_path(response)))
+
+    def test_random_sample(self):
+        before = set(os.listdir(TEMP_PROFILING_DIR))
+        with self.settings(PROFILING_SAMPLE_RATE=1):
+            response = self.client.get(self.url)
+        self.assertNotIn('X-Profile-File', response)
+        created = set(os.listdir(TEMP_PROFILING_DIR)) - before
+        self.assertEqual(len(created), 1)
+        self.assertTrue(created.pop().endswith('.collapsed'))
+
+    def test_stack_sampler(self):
+        def busy():
+            deadline = time.monotonic() + 0.05
+            while time.monotonic() < deadline:
+                pass
+
+        with profiling.StackSampler(0.001) as sampler:
+            busy()
+        self.assertTrue(sampler.stacks)
+        stack = max(sampler.stacks, key=sampler.stacks.get)
+        self.assertIn('busy_(test_profiling.py:', stack.split(';')[-1])
+        path = os.path.join(TEMP_PROFILING_DIR, 'test.collapsed')
+        sampler.dump(path)
+        with open(path, encoding='utf-8') as file:
+            stack, count = file.readline().rsplit(' ', 1)
+        self.assertGreater(int(count), 0)
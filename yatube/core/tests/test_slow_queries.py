@@ -0,0 +1,78 @@
+import json
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from .. import slow_queries
+
+User = get_user_model()
+
+
+class SlowQueryLogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        Post.objects.create(author=cls.author, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+
+    @contextmanager
+    def capture(self):
+        """Ловит записи журнала, не давая им попасть в файл."""
+        with self.settings(SLOW_QUERY_MS=1e-9), self.assertLogs(
+            'yatube.slow_queries', 'WARNING'
+        ) as logs:
+            yield logs
+
+    def records(self, logs):
+        return [json.loads(record.getMessage()) for record in logs.records]
+
+    def test_wrapper_installed_once(self):
+        self.assertEqual(
+            connection.execute_wrappers.count(slow_queries.execute), 1)
+        slow_queries.install(None, connection)
+        self.assertEqual(
+            connection.execute_wrappers.count(slow_queries.execute), 1)
+
+    def test_view_query(self):
+        with self.capture() as logs:
+            self.client.get(reverse('posts:index'))
+        record = next(
+            record for record in self.records(logs)
+            if 'posts_post' in record['sql']
+        )
+        self.assertEqual(record['view'], 'posts:index')
+        self.assertEqual(record['path'], reverse('posts:index'))
+        self.assertTrue(record['call_site'].startswith('posts/'))
+        self.assertTrue(record['plan'])
+        self.assertNotIn('EXPLAIN не удался', record['plan'][0])
+
+    def test_query_outside_request(self):
+        with self.capture() as logs, self.settings(SLOW_QUERY_PARAMS=True):
+            list(User.objects.filter(username='author'))
+            Post.objects.update(text='Новый текст')
+        select, update = self.records(logs)
+        self.assertIsNone(select['view'])
+        self.assertEqual(select['params'], ['author'])
+        self.assertTrue(select['call_site'].startswith(
+            'core/tests/test_slow_queries.py:'))
+        self.assertTrue(select['plan'])
+        self.assertIsNone(update['plan'])
+
+    def test_params_hidden_by_default(self):
+        with self.capture() as logs:
+            User.objects.filter(username='author').exists()
+        self.assertIsNone(self.records(logs)[0]['params'])
+
+    @override_settings(SLOW_QUERY_MS=60 * 1000)
+    def test_fast_queries_not_logged(self):
+        with self.assertRaises(AssertionError):
+            with self.assertLogs('yatube.slow_queries', 'WARNING'):
+                User.objects.count()
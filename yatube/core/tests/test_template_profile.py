@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(REQUEST_TIMING_SAMPLE_RATE=1)
+class TemplateProfileTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author')
+        for number in range(3):
+            Post.objects.create(author=author, text=f'Пост {number}')
+
+    def setUp(self):
+        cache.clear()
+
+    @contextmanager
+    def capture(self):
+        """Ловит записи журнала шаблонов, не давая им попасть в файл."""
+        with self.assertLogs('yatube.requests', 'INFO'), self.assertLogs(
+            'yatube.templates', 'INFO'
+        ) as logs:
+            yield logs
+
+    def test_templates_tags_and_includes(self):
+        with self.capture() as logs:
+            self.client.get(reverse('posts:index'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'posts:index')
+        templates = record['templates']
+        for label in (
+            'posts/index.html', 'base.html', 'includes/header.html',
+            'posts/includes/paginator.html', '{% post_cards %}',
+        ):
+            self.assertIn(label, templates)
+        calls, total, own = templates['base.html']
+        self.assertEqual(calls, 1)
+        self.assertLessEqual(own, total)
+        # Карточка отрисована для каждого поста.
+        self.assertEqual(templates['posts/includes/post_card.html'][0], 3)
+
+    def test_filters_keep_attributes(self):
+        with self.capture() as logs:
+            response = self.client.get(reverse('users:login'))
+        self.assertContains(response, 'class="form-control"')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertIn('|addclass', record['templates'])
+
+    def test_report(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'templates.log')
+            lines = {
+                path + '.1': {'posts/index.html': [1, 4.0, 1.0]},
+                path: {'posts/index.html': [1, 6.0, 3.0],
+                       '|addclass': [5, 2.0, 2.0]},
+            }
+            for name, templates in lines.items():
+                with open(name, 'w', encoding='utf-8') as file:
+                    file.write(json.dumps(
+                        {'view': 'posts:index', 'templates': templates}))
+                    file.write('\n')
+            out = StringIO()
+            call_command('template_report', log=path, stdout=out)
+        rows = out.getvalue().splitlines()
+        self.assertEqual(rows[0], 'Запросов: 2')
+        self.assertEqual(rows[2].split(), [
+            'posts/index.html', '2', '2', '10.0', '4.0', '2.00'])
+        self.assertEqual(rows[3].split(), [
+            '|addclass', '5', '1', '2.0', '2.0', '2.00'])
@@ -0,0 +1,76 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from .. import timing
+
+User = get_user_model()
+
+
+class TimingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author')
+        for number in range(3):
+            Post.objects.create(author=author, text=f'Пост {number}')
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=0)
+    def test_not_sampled(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=1)
+    def test_sampled_request(self):
+        with self.assertLogs('yatube.requests', 'INFO') as logs, \
+                self.assertLogs('yatube.templates', 'INFO'):
+            response = self.client.get(reverse('posts:index'))
+        self.assertNotIn('Server-Timing', response)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'posts:index')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['db_queries'], 0)
+        self.assertGreater(record['template_ms'], 0)
+        self.assertEqual(record['cache']['page'], {'hits': 0, 'misses': 1})
+        self.assertEqual(record['cache']['card'], {'hits': 0, 'misses': 3})
+
+        with self.assertLogs('yatube.requests', 'INFO') as logs:
+            self.client.get(reverse('posts:index'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['cache'], {'page': {'hits': 1, 'misses': 0}})
+        self.assertEqual(record['db_queries'], 0)
+
+    @override_settings(
+        REQUEST_TIMING_SAMPLE_RATE=1, REQUEST_TIMING_HEADER=True)
+    def test_header_only_for_staff(self):
+        with self.assertLogs('yatube.requests', 'INFO'):
+            response = self.client.get(reverse('posts:index'))
+        self.assertNotIn('Server-Timing', response)
+        self.client.force_login(User.objects.get(username='author'))
+        with self.assertLogs('yatube.requests', 'INFO'):
+            response = self.client.get(reverse('posts:index'))
+        self.assertNotIn('Server-Timing', response)
+        self.client.force_login(
+            User.objects.create_user(username='staff', is_staff=True))
+        with self.assertLogs('yatube.requests', 'INFO'):
+            response = self.client.get(reverse('posts:index'))
+        header = response['Server-Timing']
+        for metric in ('db;dur=', 'tpl;dur=', 'cache;desc=', 'total;dur='):
+            self.assertIn(metric, header)
+
+    def test_measure(self):
+        with timing.measure() as measured:
+            User.objects.count()
+            timing.record_cache('page', hits=2, misses=1)
+        self.assertEqual(measured.sql_count, 1)
+        self.assertEqual(measured.cache_hits, 2)
+        self.assertEqual(measured.cache_misses, 1)
+        self.assertIsNone(timing.current())
+        timing.record_cache('page', hits=1)
@@ -0,0 +1,178 @@
+"""Замеры запроса: SQL, отрисовка шаблонов, кэш и общее время.
+
+Замеры собираются только для выбранных запросов (см. TimingMiddleware).
+Остальные запросы платят за инструментирование одной проверкой
+ContextVar при отрисовке шаблона, вызове тега или обращении к кэшу.
+
+Время шаблонов считается по каждому шаблону, включая {% include %} и
+{% extends %}, и по тегам и фильтрам библиотек TEMPLATE_PROFILE_LIBRARIES:
+сколько раз вызван, общее время и собственное время без вложенных.
+"""
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from importlib import import_module
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import get_installed_libraries
+from django.template.base import Template
+from django.template.loader_tags import ExtendsNode
+
+from . import metrics
+
+_current = ContextVar('request_timing', default=None)
+
+
+class RequestTiming:
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        # Шаблон, тег или фильтр -> [вызовы, общее время, собственное].
+        self.templates = {}
+        # Время вложенных замеров для каждого открытого уровня.
+        self._stack = []
+        # Имя кэша -> [попадания, промахи].
+        self.cache = {}
+
+    def execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_count += 1
+            self.sql_time += time.perf_counter() - started
+
+    def call(self, label, func, *args, **kwargs):
+        """Вызывает func, записывая время под именем label."""
+        self._stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            nested = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+            else:
+                self.template_time += elapsed
+            stats = self.templates.setdefault(label, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] += elapsed - nested
+
+    @property
+    def cache_hits(self):
+        return sum(hits for hits, _ in self.cache.values())
+
+    @property
+    def cache_misses(self):
+        return sum(misses for _, misses in self.cache.values())
+
+    def templates_ms(self):
+        return {
+            label: [calls, round(total * 1000, 3), round(own * 1000, 3)]
+            for label, (calls, total, own) in self.templates.items()
+        }
+
+    def as_dict(self):
+        return {
+            'db_queries': self.sql_count,
+            'db_ms': round(self.sql_time * 1000, 2),
+            'template_ms': round(self.template_time * 1000, 2),
+            'cache': {
+                name: {'hits': hits, 'misses': misses}
+                for name, (hits, misses) in self.cache.items()
+            },
+        }
+
+
+def current():
+    """Замеры текущего запроса или None, если запрос не замеряется."""
+    return _current.get()
+
+
+def record_cache(name, hits=0, misses=0):
+    """Учитывает обращения к кэшу в метриках и в замерах запроса."""
+    if hits:
+        metrics.CACHE_REQUESTS.inc(name, 'hit', amount=hits)
+    if misses:
+        metrics.CACHE_REQUESTS.inc(name, 'miss', amount=misses)
+    timing = _current.get()
+    if timing is not None:
+        counts = timing.cache.setdefault(name, [0, 0])
+        counts[0] += hits
+        counts[1] += misses
+
+
+@contextmanager
+def measure():
+    """Собирает замеры кода внутри блока в RequestTiming."""
+    timing = RequestTiming()
+    token = _current.set(timing)
+    try:
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(timing.execute))
+            yield timing
+    finally:
+        _current.reset(token)
+
+
+def _timed(label, func):
+    """func, который под замером записывает своё время под label.
+
+    label — строка или функция от аргументов func.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        timing = _current.get()
+        if timing is None:
+            return func(*args, **kwargs)
+        name = label(*args) if callable(label) else label
+        return timing.call(name, func, *args, **kwargs)
+    wrapper.timed = True
+    return wrapper
+
+
+def _template_name(template, context):
+    return template.origin.template_name or template.name or '<строка>'
+
+
+def _parent_name(node, context):
+    # Родитель отрисовывается через _render, минуя Template.render,
+    # поэтому {% extends %} замеряется отдельно под именем родителя.
+    return node.parent_name.token.strip('\'"')
+
+
+def _timed_tag(name, compile_function):
+    @wraps(compile_function)
+    def compile(parser, token):
+        node = compile_function(parser, token)
+        node.render = _timed(f'{{% {name} %}}', node.render)
+        return node
+    return compile
+
+
+def _instrument_library(library):
+    for name, function in list(library.tags.items()):
+        library.tags[name] = _timed_tag(name, function)
+    # wraps переносит на обёртку атрибуты фильтра (is_safe,
+    # needs_autoescape), которые читает шаблонизатор.
+    for name, function in list(library.filters.items()):
+        library.filters[name] = _timed(f'|{name}', function)
+
+
+def install():
+    """Подключает замер шаблонов, тегов и фильтров; вызывается однажды."""
+    if getattr(Template.render, 'timed', False):
+        return
+    Template.render = _timed(_template_name, Template.render)
+    ExtendsNode.render = _timed(_parent_name, ExtendsNode.render)
+    libraries = get_installed_libraries()
+    for name in settings.TEMPLATE_PROFILE_LIBRARIES:
+        if name in libraries:
+            _instrument_library(import_module(libraries[name]).register)
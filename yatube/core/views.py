@@ -1,4 +1,9 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
 from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+
+from . import metrics as metrics_registry
 
 
 def page_not_found(request, exception):
@@ -16,3 +21,27 @@ def csrf_failure(request, reason=''):
 def server_error(request, reason=''):
     return render(request, 'core/500.html',
                   {'path': request.path}, status=500)
+
+
+def metrics(request):
+    """Метрики для Prometheus.
+
+    С METRICS_TOKEN нужен заголовок Authorization: Bearer <токен>.
+    Без токена метрики отдаются адресам из INTERNAL_IPS, только если это
+    разрешено METRICS_ALLOW_INTERNAL_IPS, иначе — никому.
+    """
+    token = settings.METRICS_TOKEN
+    if token:
+        allowed = constant_time_compare(
+            request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}')
+    else:
+        allowed = (
+            settings.METRICS_ALLOW_INTERNAL_IPS
+            and request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS
+        )
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        metrics_registry.render(metrics_registry.collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
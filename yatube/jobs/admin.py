@@ -0,0 +1,24 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'task', 'status', 'attempts', 'run_at', 'created')
+    list_filter = ('status',)
+    search_fields = ('task',)
+    readonly_fields = ('locked_at', 'last_error', 'created')
+    actions = ('retry',)
+
+    def retry(self, request, queryset):
+        retried = queryset.exclude(status=Job.RUNNING).update(
+            status=Job.QUEUED, attempts=0, run_at=timezone.now(),
+        )
+        self.message_user(request, f'Снова в очереди: {retried}.')
+
+    retry.allowed_permissions = ('change',)
+    retry.short_description = 'Перезапустить выбранные задачи'
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.compatibility, deploy=True)
+def check_eager_jobs(app_configs, **kwargs):
+    """Напоминает при check --deploy, что задачи выполняются в запросе."""
+    if not settings.JOBS_EAGER:
+        return []
+    return [Warning(
+        'Фоновые задачи выполняются прямо в HTTP-запросе (JOBS_EAGER).',
+        hint='На рабочем сервере задайте JOBS_EAGER=False и запустите '
+             'manage.py run_workers.',
+        id='jobs.W001',
+    )]
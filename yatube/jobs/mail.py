@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .registry import enqueue, task
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Ставит письма в очередь задач вместо отправки во время запроса.
+
+    Обработчик отправляет их через JOBS_EMAIL_BACKEND. Письма с вложениями
+    в JSON не сохранить, они отправляются сразу.
+    """
+
+    def send_messages(self, email_messages):
+        direct = [message for message in email_messages if message.attachments]
+        if direct:
+            get_connection(settings.JOBS_EMAIL_BACKEND).send_messages(direct)
+        for message in email_messages:
+            if message.attachments:
+                continue
+            enqueue(send_email, {
+                'subject': message.subject,
+                'body': message.body,
+                'from_email': message.from_email,
+                'to': message.to,
+                'cc': message.cc,
+                'bcc': message.bcc,
+                'reply_to': message.reply_to,
+                'headers': message.extra_headers,
+                'alternatives': list(getattr(message, 'alternatives', [])),
+            })
+        return len(email_messages)
+
+
+@task
+def send_email(data):
+    alternatives = data.pop('alternatives', [])
+    message = EmailMultiAlternatives(**data)
+    for content, mimetype in alternatives:
+        message.attach_alternative(content, mimetype)
+    get_connection(settings.JOBS_EMAIL_BACKEND).send_messages([message])
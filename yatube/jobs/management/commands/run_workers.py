@@ -0,0 +1,81 @@
+import multiprocessing
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs.worker import work
+
+
+def _process_main(poll_interval, once):
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    work(stop, poll_interval, once)
+
+
+class Command(BaseCommand):
+    help = 'Запускает обработчики фоновых задач из очереди'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.JOBS_WORKERS,
+            help='Число обработчиков',
+        )
+        parser.add_argument(
+            '--processes', action='store_true',
+            help='Обработчики в отдельных процессах, а не в потоках',
+        )
+        parser.add_argument(
+            '--poll', type=float, default=settings.JOBS_POLL_INTERVAL,
+            help='Пауза между проверками пустой очереди, секунд',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и завершиться',
+        )
+
+    def handle(self, *args, **options):
+        workers = max(options['workers'], 1)
+        poll, once = options['poll'], options['once']
+        if options['processes']:
+            self.run_processes(workers, poll, once)
+        else:
+            self.run_threads(workers, poll, once)
+
+    def run_threads(self, workers, poll, once):
+        stop = threading.Event()
+        threads = [
+            threading.Thread(target=work, args=(stop, poll, once))
+            for _ in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=1)
+        except KeyboardInterrupt:
+            self.stdout.write('Остановка после текущих задач...')
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    def run_processes(self, workers, poll, once):
+        # Соединения с базой не должны переходить в дочерние процессы.
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=_process_main, args=(poll, once))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            self.stdout.write('Остановка после текущих задач...')
+            for process in processes:
+                process.terminate()
+                process.join()
@@ -0,0 +1,43 @@
+"""Регистрация задач и постановка их в очередь."""
+import json
+
+from django.conf import settings
+
+_tasks = {}
+
+
+def task_name(func):
+    return f'{func.__module__}.{func.__name__}'
+
+
+def task(func):
+    """Регистрирует функцию как задачу; сама функция не меняется.
+
+    Аргументы задачи сохраняются в JSON, поэтому передавать нужно
+    простые значения: ключи объектов, а не сами объекты.
+    """
+    _tasks[task_name(func)] = func
+    return func
+
+
+def get_task(name):
+    return _tasks[name]
+
+
+def enqueue(func, *args, **kwargs):
+    """Ставит задачу в очередь в текущей транзакции.
+
+    Задача попадает в очередь, только если транзакция зафиксирована,
+    и видит все её изменения. При JOBS_EAGER задача выполняется сразу.
+    """
+    name = task_name(func)
+    if name not in _tasks:
+        raise ValueError(f'Задача {name} не зарегистрирована')
+    # Сериализуем и в немедленном режиме, чтобы ошибки в аргументах
+    # проявлялись одинаково.
+    args_json, kwargs_json = json.dumps(args), json.dumps(kwargs)
+    if settings.JOBS_EAGER:
+        func(*args, **kwargs)
+        return None
+    from .models import Job
+    return Job.objects.create(task=name, args=args_json, kwargs=kwargs_json)
@@ -0,0 +1,142 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import checks, mail
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from posts.models import Follow, Post, TimelineEntry
+
+from ..models import Job
+from ..registry import enqueue, task
+from ..worker import claim, release_stale, run_job, work
+
+User = get_user_model()
+
+calls = []
+
+
+@task
+def remember(value):
+    calls.append(value)
+
+
+@task
+def explode():
+    raise RuntimeError('Сбой задачи')
+
+
+def run_all():
+    work(threading.Event(), poll_interval=0, once=True)
+
+
+@override_settings(JOBS_EAGER=False)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueued_job_runs_and_disappears(self):
+        job = enqueue(remember, 'значение')
+        self.assertEqual(calls, [])
+        self.assertEqual(job.status, Job.QUEUED)
+        run_all()
+        self.assertEqual(calls, ['значение'])
+        self.assertFalse(Job.objects.exists())
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_mode_runs_immediately(self):
+        self.assertIsNone(enqueue(remember, 1))
+        self.assertEqual(calls, [1])
+
+    def test_deploy_check_warns_about_eager_mode(self):
+        with self.settings(JOBS_EAGER=True):
+            messages = checks.run_checks(include_deployment_checks=True)
+            self.assertIn('jobs.W001', [message.id for message in messages])
+        messages = checks.run_checks(include_deployment_checks=True)
+        self.assertNotIn('jobs.W001', [message.id for message in messages])
+
+    def test_unregistered_and_unserializable_are_rejected(self):
+        with self.assertRaises(ValueError):
+            enqueue(print, 1)
+        with self.assertRaises(TypeError):
+            enqueue(remember, object())
+
+    @override_settings(JOBS_BACKOFF_BASE=10, JOBS_MAX_ATTEMPTS=2)
+    def test_failed_job_is_retried_with_backoff(self):
+        job = enqueue(explode)
+        self.assertFalse(run_job(claim()))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn('Сбой задачи', job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=5))
+        # До наступления run_at задача не берётся.
+        self.assertIsNone(claim())
+
+        Job.objects.update(run_at=timezone.now())
+        run_all()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_stale_running_job_is_released(self):
+        job = enqueue(remember, 1)
+        claim()
+        self.assertIsNone(claim())
+        Job.objects.update(locked_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(release_stale(), 1)
+        # Прерванный запуск считается попыткой и повторяется через паузу.
+        self.assertIsNone(claim())
+        Job.objects.update(run_at=timezone.now())
+        self.assertEqual(claim(), job)
+
+    def test_stale_job_without_attempts_fails(self):
+        job = enqueue(remember, 1)
+        Job.objects.update(max_attempts=1)
+        claim()
+        Job.objects.update(locked_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(release_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIsNone(claim())
+
+    def test_follow_bookkeeping_runs_in_background(self):
+        author = User.objects.create_user(username='author')
+        reader = User.objects.create_user(username='reader')
+        Post.objects.create(author=author, text='Старый пост')
+        Follow.objects.create(user=reader, author=author)
+        Post.objects.create(author=author, text='Новый пост')
+        self.assertFalse(TimelineEntry.objects.exists())
+        run_all()
+        self.assertEqual(reader.timeline.count(), 2)
+
+        Follow.objects.filter(user=reader).delete()
+        Follow.objects.create(user=reader, author=author)
+        Follow.objects.filter(user=reader).delete()
+        run_all()
+        self.assertEqual(reader.timeline.count(), 0)
+
+    @override_settings(
+        EMAIL_BACKEND='jobs.mail.QueuedEmailBackend',
+        JOBS_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    )
+    def test_email_is_sent_by_worker(self):
+        mail.send_mail('Тема', 'Текст', 'from@example.com', ['to@example.com'])
+        self.assertEqual(len(mail.outbox), 0)
+        run_all()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Тема')
+
+
+@override_settings(JOBS_EAGER=False)
+class RunWorkersCommandTests(TransactionTestCase):
+    def test_workers_drain_queue(self):
+        calls.clear()
+        for number in range(5):
+            enqueue(remember, number)
+        call_command('run_workers', '--once', '--workers=2', stdout=StringIO())
+        self.assertEqual(sorted(calls), list(range(5)))
+        self.assertFalse(Job.objects.exists())
@@ -0,0 +1,113 @@
+"""Выполнение задач из очереди."""
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+from .registry import get_task
+
+logger = logging.getLogger(__name__)
+
+
+def backoff(attempts):
+    """Пауза перед повтором: растёт вдвое с каждой попыткой."""
+    seconds = settings.JOBS_BACKOFF_BASE * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, settings.JOBS_BACKOFF_MAX))
+
+
+def release_stale():
+    """Разбирает задачи упавших обработчиков.
+
+    Прерванный запуск уже засчитан в attempts при захвате задачи. Как и
+    после ошибки, задача повторяется через паузу backoff, а исчерпавшая
+    попытки помечается сбоем: иначе задача, которая роняет обработчик,
+    например по памяти, перезапускалась бы бесконечно.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status=Job.RUNNING,
+        locked_at__lt=now - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT),
+    )
+    released = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED,
+        locked_at=None,
+        last_error='Обработчик остановился, не завершив задачу.',
+    )
+    # Пауза зависит от числа попыток; разных значений у них немного,
+    # поэтому задачи обновляются одним UPDATE на значение.
+    for attempts in stale.values_list('attempts', flat=True).distinct():
+        released += stale.filter(attempts=attempts).update(
+            status=Job.QUEUED,
+            run_at=now + backoff(attempts),
+            locked_at=None,
+        )
+    return released
+
+
+def claim():
+    """Забирает одну готовую к запуску задачу или возвращает None.
+
+    Задача захватывается условным UPDATE по состоянию, поэтому один и тот
+    же Job не достанется двум обработчикам без блокировок строк.
+    """
+    now = timezone.now()
+    candidates = Job.objects.filter(
+        status=Job.QUEUED, run_at__lte=now
+    ).order_by('run_at', 'pk').values_list('pk', flat=True)[:10]
+    for pk in candidates:
+        claimed = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING, locked_at=now, attempts=F('attempts') + 1
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def run_job(job):
+    """Выполняет задачу; при ошибке планирует повтор или помечает сбой.
+
+    Изменения задачи и удаление Job фиксируются одной транзакцией.
+    """
+    try:
+        with transaction.atomic():
+            get_task(job.task)(
+                *json.loads(job.args), **json.loads(job.kwargs)
+            )
+            Job.objects.filter(pk=job.pk).delete()
+    except Exception:
+        logger.exception('Задача %s завершилась ошибкой', job)
+        failed = job.attempts >= job.max_attempts
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.FAILED if failed else Job.QUEUED,
+            run_at=timezone.now() + backoff(job.attempts),
+            locked_at=None,
+            last_error=traceback.format_exc(),
+        )
+        return False
+    return True
+
+
+def work(stop, poll_interval, once=False):
+    """Цикл обработчика: берёт задачи, пока не выставлено событие stop.
+
+    С once=True завершается, когда готовых задач не осталось.
+    """
+    try:
+        while not stop.is_set():
+            close_old_connections()
+            release_stale()
+            job = claim()
+            if job is None:
+                if once:
+                    return
+                stop.wait(poll_interval)
+                continue
+            run_job(job)
+    finally:
+        connection.close()
@@ -1,9 +1,113 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.contrib.admin.helpers import ActionForm
+from django.db.models.expressions import RawSQL
+from django.template.response import TemplateResponse
 
+from . import bulk, search
 from .models import Comment, Group, Post
+from .paginator import EstimatedCountPaginator
 
 
-class PostAdmin(admin.ModelAdmin):
+class FullTextSearchMixin:
+    """Поиск в списке объектов по индексу FTS5 вместо icontains."""
+    search_ids_sql = None
+
+    def get_search_results(self, request, queryset, search_term):
+        query = search.build_query(search_term)
+        if query is None or not search.is_enabled():
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        ids = RawSQL(self.search_ids_sql, [query])
+        return queryset.filter(pk__in=ids), False
+
+
+class AuthorFilter(admin.SimpleListFilter):
+    """Фильтр по имени автора: поле ввода вместо списка всех авторов.
+
+    Стандартные фильтры по связи перечисляют всех пользователей или
+    собирают авторов через DISTINCT по таблице.
+    """
+    title = 'автору'
+    parameter_name = 'author'
+    template = 'admin/posts/input_filter.html'
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(author__username=self.value())
+        return queryset
+
+    def choices(self, changelist):
+        yield {
+            'parameter_name': self.parameter_name,
+            'value': self.value() or '',
+            'placeholder': 'имя пользователя',
+            'params': [
+                (name, value) for name, value in changelist.params.items()
+                if name != self.parameter_name
+            ],
+            'clear_url': changelist.get_query_string(
+                remove=[self.parameter_name]),
+        }
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Список объектов большой таблицы без точного COUNT(*) всей таблицы."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class BulkDeleteMixin:
+    """Удаление выбранных объектов одним DELETE на порцию.
+
+    Стандартное действие удаления загружает каждый объект и удаляет
+    каскад построчно; здесь подтверждение показывает только их число.
+    """
+    bulk_delete = None
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def delete_in_bulk(self, request, queryset):
+        if request.POST.get('post') == 'yes':
+            deleted = self.bulk_delete(queryset)
+            self.message_user(request, f'Удалено объектов: {deleted}.')
+            return None
+        opts = self.model._meta
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Вы уверены?',
+            'opts': opts,
+            'count': queryset.count(),
+            'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across', '0'),
+            'action': 'delete_in_bulk',
+        }
+        return TemplateResponse(
+            request, 'admin/posts/bulk_delete_confirmation.html', context
+        )
+
+    delete_in_bulk.allowed_permissions = ('delete',)
+    delete_in_bulk.short_description = (
+        'Удалить выбранные %(verbose_name_plural)s'
+    )
+
+
+class GroupActionForm(ActionForm):
+    group = forms.SlugField(label='Адрес группы', required=False)
+
+
+class PostAdmin(BulkDeleteMixin, FullTextSearchMixin, LargeTableAdmin):
     # Перечисляем поля, которые должны отображаться в админке
     list_display = (
         'pk',
@@ -12,15 +116,49 @@ class PostAdmin(admin.ModelAdmin):
         'author',
         'group',
     )
-    list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    # Вместо <select> со всеми группами и авторами — поиск по вводу.
+    # Группа меняется на странице поста: в списке такой виджет делал бы
+    # отдельный запрос на каждую строку.
+    autocomplete_fields = ('author', 'group')
     # Добавляем интерфейс для поиска по тексту постов
     search_fields = ('text',)
-    # Добавляем возможность фильтрации по дате
-    list_filter = ('pub_date',)
+    search_ids_sql = search.POST_IDS_SQL
+    # Фильтр по дате отбирает диапазоны (сегодня, 7 дней, месяц, год) по
+    # индексу pub_date. date_hierarchy не подключён: список дат для него
+    # строится SELECT DISTINCT по всей таблице.
+    list_filter = ('pub_date', AuthorFilter)
     empty_value_display = '-пусто-'
+    # Действия выполняются над всеми выбранными постами, в том числе над
+    # всеми найденными фильтрами по дате и автору при «выбрать все»
+    action_form = GroupActionForm
+    actions = ('move_to_group', 'clear_group', 'delete_in_bulk')
+    bulk_delete = staticmethod(bulk.delete_posts)
+
+    def move_to_group(self, request, queryset):
+        slug = request.POST.get('group')
+        group = Group.objects.filter(slug=slug).first() if slug else None
+        if group is None:
+            self.message_user(
+                request, 'Укажите адрес существующей группы.',
+                messages.ERROR,
+            )
+            return
+        moved = bulk.move_posts(queryset, group)
+        self.message_user(request, f'Перенесено в «{group}»: {moved}.')
+
+    move_to_group.allowed_permissions = ('change',)
+    move_to_group.short_description = 'Перенести в группу'
 
+    def clear_group(self, request, queryset):
+        moved = bulk.move_posts(queryset, None)
+        self.message_user(request, f'Убрано из групп: {moved}.')
 
-class GroupAdmin(admin.ModelAdmin):
+    clear_group.allowed_permissions = ('change',)
+    clear_group.short_description = 'Убрать из группы'
+
+
+class GroupAdmin(LargeTableAdmin):
     list_display = (
         'pk',
         'title',
@@ -31,10 +169,17 @@ class GroupAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
-class CommentAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'text')
+class CommentAdmin(BulkDeleteMixin, FullTextSearchMixin, LargeTableAdmin):
+    list_display = ('pk', 'text', 'author', 'post', 'created')
+    list_select_related = ('author', 'post')
+    autocomplete_fields = ('author', 'post')
     search_fields = ('text',)
-    empty_value_disply = "--пусто--"
+    search_ids_sql = search.COMMENT_IDS_SQL
+    # Диапазоны дат идут по индексу created, см. PostAdmin
+    list_filter = ('created', AuthorFilter)
+    empty_value_display = '-пусто-'
+    actions = ('delete_in_bulk',)
+    bulk_delete = staticmethod(bulk.delete_comments)
 
 
 admin.site.register(Post, PostAdmin)
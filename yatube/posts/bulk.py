@@ -0,0 +1,104 @@
+"""Массовые операции над постами и комментариями.
+
+Изменения выполняются порциями по BULK_BATCH_SIZE строк, каждая порция —
+одним UPDATE или DELETE без загрузки объектов и без сигналов. То, что
+обычно делают сигналы, выполняется пакетом после каждой порции:
+пересчёт счётчиков, чистка поискового индекса и сброс кэша страниц.
+"""
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+
+from . import counters, page_cache, search
+from .models import Comment, Post, TimelineEntry
+
+
+def _chunks(queryset):
+    """Отдаёт первичные ключи queryset порциями, двигаясь по ключу."""
+    ids = queryset.order_by('pk').values_list('pk', flat=True)
+    last = None
+    while True:
+        chunk = ids if last is None else ids.filter(pk__gt=last)
+        chunk = list(chunk[:settings.BULK_BATCH_SIZE])
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1]
+
+
+@contextmanager
+def keep_dates(*fields):
+    """Отключает auto_now_add, чтобы bulk_create сохранил заданные даты."""
+    saved = [field.auto_now_add for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in zip(fields, saved):
+            field.auto_now_add = value
+
+
+def _post_tags(posts):
+    """Теги страниц, на которых видны посты, одним запросом."""
+    tags = {'index'}
+    rows = posts.values_list('pk', 'author__username', 'group__slug')
+    for pk, username, slug in rows:
+        tags.update((f'post:{pk}', f'card:post:{pk}', f'profile:{username}'))
+        if slug:
+            tags.add(f'group:{slug}')
+    return tags
+
+
+def move_posts(queryset, group):
+    """Переносит посты в группу `group`; None убирает их из групп."""
+    moved = 0
+    for ids in _chunks(queryset.exclude(group=group)):
+        posts = Post.objects.filter(pk__in=ids)
+        with transaction.atomic():
+            tags = _post_tags(posts)
+            moved += posts.update(group=group)
+        page_cache.invalidate(
+            *tags, f'group:{group.slug}' if group else None
+        )
+    return moved
+
+
+def delete_posts(queryset):
+    """Удаляет посты вместе с их комментариями и записями лент."""
+    deleted = 0
+    for ids in _chunks(queryset):
+        posts = Post.objects.filter(pk__in=ids)
+        comments = Comment.objects.filter(post_id__in=ids)
+        entries = TimelineEntry.objects.filter(post_id__in=ids)
+        with transaction.atomic():
+            tags = _post_tags(posts)
+            author_ids = set(posts.values_list('author_id', flat=True))
+            search.unindex_comments(
+                list(comments.values_list('pk', flat=True))
+            )
+            search.unindex_posts(ids)
+            comments._raw_delete(comments.db)
+            entries._raw_delete(entries.db)
+            deleted += posts._raw_delete(posts.db)
+            counters.recount_users(author_ids)
+        page_cache.invalidate(
+            *tags, *(f'author:{pk}' for pk in author_ids))
+    return deleted
+
+
+def delete_comments(queryset):
+    """Удаляет комментарии и пересчитывает их число у постов."""
+    deleted = 0
+    for ids in _chunks(queryset):
+        comments = Comment.objects.filter(pk__in=ids)
+        with transaction.atomic():
+            post_ids = set(
+                comments.exclude(post=None).values_list('post_id', flat=True)
+            )
+            search.unindex_comments(ids)
+            deleted += comments._raw_delete(comments.db)
+            counters.recount_comments(post_ids)
+        page_cache.invalidate(*(f'post:{pk}' for pk in post_ids))
+    return deleted
@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from core.timing import record_cache
+
+from .page_cache import get_versions
+from .thumbnails import resolve_thumbnails
+
+CARD_TEMPLATE = 'posts/includes/post_card.html'
+
+
+def card_tags(post):
+    """Теги, от которых зависит разметка карточки поста."""
+    return [
+        f'card:post:{post.pk}',
+        f'card:user:{post.author_id}',
+        f'card:group:{post.group_id}',
+    ]
+
+
+def render_cards(posts):
+    """Возвращает HTML карточек, рендеря только отсутствующие в кэше.
+
+    Версии тегов и готовые карточки всей страницы читаются двумя
+    запросами get_many, миниатюры для недостающих карточек ищутся одним
+    пакетом, новые карточки сохраняются одним set_many.
+    """
+    posts = list(posts)
+    tags = sorted({tag for post in posts for tag in card_tags(post)})
+    versions = dict(zip(tags, get_versions(tags)))
+    keys = [
+        'post-card:{}:{}'.format(
+            post.pk, '.'.join(versions[tag] for tag in card_tags(post))
+        )
+        for post in posts
+    ]
+    cached = cache.get_many(keys)
+    thumbnails = resolve_thumbnails(
+        post.image for post, key in zip(posts, keys) if key not in cached
+    )
+    template = get_template(CARD_TEMPLATE)
+    cards, missing = [], {}
+    for post, key in zip(posts, keys):
+        html = cached.get(key)
+        if html is None:
+            html = template.render({
+                'post': post,
+                'thumbnail': thumbnails.get(post.image.name),
+            })
+            missing[key] = html
+        cards.append(mark_safe(html))
+    record_cache('card', hits=len(posts) - len(missing), misses=len(missing))
+    if missing:
+        cache.set_many(missing, settings.CARD_CACHE_TIMEOUT)
+    return cards
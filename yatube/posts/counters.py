@@ -0,0 +1,96 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Post, User, UserStats
+
+
+def _count(queryset, field):
+    """Подзапрос с количеством строк queryset, сгруппированных по field."""
+    return Coalesce(
+        Subquery(
+            queryset.order_by().values(field).annotate(
+                total=Count('pk')).values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def recount_user(user_id):
+    """Пересчитывает счётчики одного пользователя по данным в базе."""
+    stats, _ = UserStats.objects.update_or_create(
+        user_id=user_id,
+        defaults={
+            'posts_count': Post.objects.filter(author_id=user_id).count(),
+            'followers_count': Follow.objects.filter(
+                author_id=user_id).count(),
+            'following_count': Follow.objects.filter(
+                user_id=user_id).count(),
+        },
+    )
+    return stats
+
+
+def get_stats(user):
+    """Возвращает счётчики пользователя, создавая их при отсутствии."""
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        return recount_user(user.pk)
+
+
+def change_user_counters(user_id, **deltas):
+    """Атомарно меняет счётчики пользователя на заданные величины."""
+    updated = UserStats.objects.filter(user_id=user_id).update(**{
+        field: Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()
+    })
+    if not updated and User.objects.filter(pk=user_id).exists():
+        recount_user(user_id)
+
+
+def change_comments_count(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comments_count=Greatest(F('comments_count') + delta, 0)
+    )
+
+
+def recount_users(user_ids=None):
+    """Пересчитывает счётчики пользователей одним UPDATE.
+
+    Без user_ids пересчитываются все пользователи.
+    """
+    stats = UserStats.objects.all()
+    if user_ids is not None:
+        stats = stats.filter(user_id__in=user_ids)
+    return stats.update(
+        posts_count=_count(
+            Post.objects.filter(author=OuterRef('user')), 'author'),
+        followers_count=_count(
+            Follow.objects.filter(author=OuterRef('user')), 'author'),
+        following_count=_count(
+            Follow.objects.filter(user=OuterRef('user')), 'user'),
+    )
+
+
+def recount_comments(post_ids=None):
+    """Пересчитывает число комментариев постов одним UPDATE."""
+    posts = Post.objects.all()
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+    return posts.update(
+        comments_count=_count(
+            Comment.objects.filter(post=OuterRef('pk')), 'post'),
+    )
+
+
+def recount_all():
+    """Пересчитывает все счётчики несколькими UPDATE по всей таблице."""
+    missing = User.objects.filter(stats__isnull=True).values_list(
+        'pk', flat=True)
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=user_id) for user_id in missing.iterator()],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    return recount_users(), recount_comments()
@@ -0,0 +1,111 @@
+"""Потоковая выгрузка постов, комментариев и подписок.
+
+Строки читаются из базы через .iterator(chunk_size=...) и сразу
+превращаются в строки JSONL или CSV, поэтому память не зависит от
+объёма выгрузки. Формат постов совпадает с входным форматом import_posts.
+"""
+import csv
+import json
+import zlib
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Comment, Follow, Post
+
+FORMATS = ('jsonl', 'csv')
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+# Поля выгрузок: имя в файле и путь к значению в базе.
+EXPORTS = {
+    'posts': (Post, (
+        ('id', 'id'),
+        ('author', 'author__username'),
+        ('group', 'group__slug'),
+        ('text', 'text'),
+        ('pub_date', 'pub_date'),
+    )),
+    'comments': (Comment, (
+        ('id', 'id'),
+        ('post_id', 'post_id'),
+        ('author', 'author__username'),
+        ('text', 'text'),
+        ('created', 'created'),
+    )),
+    'follows': (Follow, (
+        ('user', 'user__username'),
+        ('author', 'author__username'),
+    )),
+}
+
+
+class _Echo:
+    """Файл для csv.writer, который возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def _as_text(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def jsonl_lines(rows, names):
+    for row in rows:
+        yield json.dumps(
+            dict(zip(names, row)), cls=DjangoJSONEncoder, ensure_ascii=False,
+        ) + '\n'
+
+
+def csv_lines(rows, names):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(names)
+    for row in rows:
+        yield writer.writerow([_as_text(value) for value in row])
+
+
+def export_lines(kind, file_format, queryset=None, chunk_size=None):
+    """Строки выгрузки `kind` в формате `file_format`, по одной.
+
+    `queryset` ограничивает выгрузку, например постами одного автора.
+    """
+    model, fields = EXPORTS[kind]
+    if queryset is None:
+        queryset = model.objects.all()
+    names = [name for name, _ in fields]
+    rows = queryset.order_by('pk').values_list(
+        *(lookup for _, lookup in fields)
+    ).iterator(chunk_size=chunk_size or settings.EXPORT_CHUNK_SIZE)
+    lines = csv_lines if file_format == 'csv' else jsonl_lines
+    return lines(rows, names)
+
+
+def encode_chunks(lines, compress=False, buffer_size=64 * 1024):
+    """Собирает строки в блоки байтов, при необходимости сжимая в gzip."""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    buffer = []
+    size = 0
+    for line in lines:
+        data = line.encode()
+        buffer.append(data)
+        size += len(data)
+        if size >= buffer_size:
+            block = b''.join(buffer)
+            buffer, size = [], 0
+            if compress:
+                block = compressor.compress(block)
+            if block:
+                yield block
+    block = b''.join(buffer)
+    if compress:
+        block = compressor.compress(block) + compressor.flush()
+    if block:
+        yield block
@@ -1,6 +1,8 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
 from .models import Comment, Post
+from .uploads import prepare_post_image, validate_upload_size
 
 
 class PostForm(forms.ModelForm):
@@ -8,6 +10,26 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ("text", "group", "image")
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Обработчик загрузки обрезает файлы сверх лимита; такой файл не
+        # отдаём на проверку картинки, чтобы показать ошибку о размере.
+        image = self.files.get('image')
+        self.oversized_image = None
+        if getattr(image, 'too_large', False):
+            self.oversized_image = image
+            self.files = self.files.copy()
+            del self.files['image']
+
+    def clean_image(self):
+        if self.oversized_image is not None:
+            validate_upload_size(self.oversized_image)
+        image = self.cleaned_data.get('image')
+        # При редактировании без новой загрузки здесь уже сохранённый файл.
+        if isinstance(image, UploadedFile):
+            return prepare_post_image(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
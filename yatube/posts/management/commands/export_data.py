@@ -0,0 +1,42 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from posts.export import EXPORTS, FORMATS, encode_chunks, export_lines
+
+
+class Command(BaseCommand):
+    help = 'Потоково выгружает посты, комментарии или подписки'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл для выгрузки; по умолчанию стандартный вывод',
+        )
+        parser.add_argument(
+            '--gzip', action='store_true', help='Сжимать выгрузку в gzip')
+        parser.add_argument(
+            '--chunk-size', type=int,
+            help='Сколько строк читать из базы за один запрос',
+        )
+
+    def handle(self, *args, **options):
+        lines = export_lines(
+            options['kind'], options['format'],
+            chunk_size=options['chunk_size'],
+        )
+        if options['output'] == '-' and not options['gzip']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        chunks = encode_chunks(lines, compress=options['gzip'])
+        if options['output'] == '-':
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+        with open(options['output'], 'wb') as output:
+            for chunk in chunks:
+                output.write(chunk)
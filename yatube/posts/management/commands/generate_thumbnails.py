@@ -0,0 +1,31 @@
+from concurrent.futures import wait
+
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.thumbnails import generate_thumbnails, schedule_thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Создаёт миниатюры для всех картинок постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--inline', action='store_true',
+            help='Создавать миниатюры в текущем процессе, без пула',
+        )
+
+    def handle(self, *args, **options):
+        images = Post.objects.exclude(image='').values_list(
+            'image', flat=True)
+        futures = []
+        for name in images.iterator():
+            if options['inline']:
+                generate_thumbnails(name)
+            else:
+                futures.append(schedule_thumbnails(name))
+        wait(futures)
+        failed = sum(1 for future in futures if future.exception())
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано картинок: {images.count()}, ошибок: {failed}'
+        ))
@@ -0,0 +1,294 @@
+import csv
+import json
+import os
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import counters, page_cache, search
+from posts.bulk import keep_dates
+from posts.models import Comment, Group, Post, User
+from posts.timeline import fan_out_posts
+
+
+class Lookup:
+    """Словарь «имя -> id», который дочитывается из базы порциями."""
+
+    def __init__(self, queryset, field):
+        self.queryset = queryset
+        self.field = field
+        self.ids = {}
+
+    def load(self, names):
+        missing = {name for name in names if name and name not in self.ids}
+        if missing:
+            self.ids.update(
+                self.queryset.filter(**{f'{self.field}__in': missing})
+                .values_list(self.field, 'pk')
+            )
+
+    def get(self, name):
+        return self.ids.get(name)
+
+
+def read_jsonl(stream):
+    for number, line in enumerate(stream, 1):
+        if line.strip():
+            try:
+                yield number, json.loads(line)
+            except ValueError as error:
+                yield number, error
+
+
+def read_csv(stream):
+    for number, row in enumerate(csv.DictReader(stream), 2):
+        yield number, row
+
+
+def _check_record(record):
+    """Возвращает ошибку формы записи или None."""
+    if isinstance(record, Exception):
+        return record
+    if not isinstance(record, dict):
+        return 'запись должна быть объектом'
+    comments = record.get('comments') or []
+    if not isinstance(comments, list) or not all(
+        isinstance(comment, dict) for comment in comments
+    ):
+        return 'comments должен быть списком объектов'
+    return None
+
+
+def _parse_date(value):
+    if not value:
+        return timezone.now()
+    date = parse_datetime(value)
+    if date is None:
+        raise ValueError(f'неверная дата {value!r}')
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date
+
+
+def _lock_tables(*models):
+    """Не даёт другим соединениям вставлять строки до конца транзакции."""
+    if connection.vendor == 'sqlite':
+        # Любой UPDATE берёт блокировку записи сразу на всю базу.
+        table = connection.ops.quote_name(models[0]._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(f'UPDATE {table} SET id = id WHERE 0 = 1')
+        return
+    for model in models:
+        # Блокировка последней строки закрывает и промежуток за ней
+        # (next-key lock в InnoDB).
+        list(
+            model.objects.select_for_update().order_by('-pk')
+            .values_list('pk', flat=True)[:1]
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует посты с комментариями из JSONL или CSV. Поля записи: '
+        'author, text, group, pub_date; в JSONL ещё comments — список '
+        'с полями author, text, created.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл с постами; «-» — стандартный ввод')
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'),
+            help='Формат файла; по умолчанию определяется по расширению',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.BULK_BATCH_SIZE,
+            help='Сколько постов вставлять в одной транзакции',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'jsonl'
+        )
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля')
+        self.batch_size = options['batch_size']
+        self.users = Lookup(User.objects.all(), 'username')
+        self.groups = Lookup(Group.objects.all(), 'slug')
+        self.posts_total = self.comments_total = 0
+        self.skipped = self.skipped_comments = 0
+        self.started = time.monotonic()
+
+        if path != '-' and not os.path.exists(path):
+            raise CommandError(f'Файл {path} не найден')
+        stream = (
+            sys.stdin if path == '-'
+            else open(path, encoding='utf-8', newline='')
+        )
+        reader = read_csv if file_format == 'csv' else read_jsonl
+        try:
+            with keep_dates(
+                Post._meta.get_field('pub_date'),
+                Comment._meta.get_field('created'),
+            ):
+                self.import_records(reader(stream))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово. {self.progress()}, пропущено записей: {self.skipped}, '
+            f'комментариев: {self.skipped_comments}'
+        ))
+
+    def import_records(self, records):
+        batch = []
+        for number, record in records:
+            error = _check_record(record)
+            if error is not None:
+                self.skip(number, error)
+                continue
+            batch.append((number, record))
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch)
+                batch = []
+        if batch:
+            self.import_batch(batch)
+
+    def skip(self, number, reason, comment=None):
+        """Сообщает о пропущенной записи или об одном её комментарии."""
+        if comment is None:
+            self.skipped += 1
+            self.stderr.write(f'Строка {number} пропущена: {reason}')
+        else:
+            self.skipped_comments += 1
+            self.stderr.write(
+                f'Строка {number}, комментарий {comment} пропущен: {reason}')
+
+    def progress(self):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        return (
+            f'Постов: {self.posts_total}, '
+            f'комментариев: {self.comments_total}, '
+            f'{self.posts_total / elapsed:.0f} постов/с'
+        )
+
+    def build_objects(self, batch):
+        """Превращает записи порции в несохранённые Post и Comment."""
+        self.users.load(
+            name for _, record in batch
+            for name in [record.get('author')] + [
+                comment.get('author')
+                for comment in record.get('comments') or ()
+            ]
+        )
+        self.groups.load(record.get('group') for _, record in batch)
+        posts, comments = [], []
+        for number, record in batch:
+            author_id = self.users.get(record.get('author'))
+            group_id = self.groups.get(record.get('group'))
+            try:
+                if not record.get('text'):
+                    raise ValueError('пустой текст')
+                if author_id is None:
+                    raise ValueError(
+                        f'нет пользователя {record.get("author")!r}')
+                if record.get('group') and group_id is None:
+                    raise ValueError(f'нет группы {record.get("group")!r}')
+                post = Post(
+                    author_id=author_id,
+                    group_id=group_id,
+                    text=record['text'],
+                    pub_date=_parse_date(record.get('pub_date')),
+                )
+                post_comments = self.build_comments(
+                    number, post, record.get('comments') or ())
+            except (ValueError, TypeError, AttributeError) as error:
+                self.skip(number, error)
+                continue
+            post.comments_count = len(post_comments)
+            posts.append(post)
+            comments += post_comments
+        return posts, comments
+
+    def build_comments(self, number, post, records):
+        comments = []
+        for index, record in enumerate(records, 1):
+            author_id = self.users.get(record.get('author'))
+            if not record.get('text'):
+                self.skip(number, 'пустой текст', comment=index)
+            elif author_id is None:
+                self.skip(
+                    number, f'нет пользователя {record.get("author")!r}',
+                    comment=index)
+            else:
+                comments.append(Comment(
+                    post=post,
+                    author_id=author_id,
+                    text=record['text'],
+                    created=_parse_date(record.get('created')),
+                ))
+        return comments
+
+    def insert(self, posts, comments):
+        """Сохраняет посты и комментарии порции, заполняя их ключи.
+
+        Ключи нужны комментариям и поисковому индексу. PostgreSQL
+        возвращает их из bulk_create. Остальные базы не возвращают: тогда
+        таблицы блокируются до конца транзакции, и ключи назначаются за
+        текущим максимумом, так что вставки с сайта их не займут.
+        """
+        if connection.features.can_return_ids_from_bulk_insert:
+            Post.objects.bulk_create(posts)
+            for comment in comments:
+                comment.post_id = comment.post.pk
+            Comment.objects.bulk_create(comments)
+            return
+        _lock_tables(Post, Comment)
+        first_post = Post.objects.aggregate(Max('pk'))['pk__max'] or 0
+        first_comment = Comment.objects.aggregate(Max('pk'))['pk__max'] or 0
+        for pk, post in enumerate(posts, first_post + 1):
+            post.pk = pk
+        for pk, comment in enumerate(comments, first_comment + 1):
+            comment.pk = pk
+            comment.post_id = comment.post.pk
+        Post.objects.bulk_create(posts)
+        Comment.objects.bulk_create(comments)
+
+    def import_batch(self, batch):
+        posts, comments = self.build_objects(batch)
+        if not posts:
+            return
+        with transaction.atomic():
+            self.insert(posts, comments)
+            search.index_posts(posts)
+            search.index_comments(comments)
+            author_ids = {post.author_id for post in posts}
+            self.fan_out(posts)
+            counters.recount_users(author_ids)
+        page_cache.invalidate('index', *self.tags(posts, author_ids))
+        self.posts_total += len(posts)
+        self.comments_total += len(comments)
+        self.stdout.write(self.progress())
+
+    def fan_out(self, posts):
+        """Раскладывает посты порции по лентам подписчиков авторов."""
+        fan_out_posts(Post.objects.filter(pk__in=[post.pk for post in posts]))
+
+    def tags(self, posts, author_ids):
+        usernames = User.objects.filter(pk__in=author_ids).values_list(
+            'username', flat=True)
+        slugs = Group.objects.filter(
+            pk__in={post.group_id for post in posts if post.group_id}
+        ).values_list('slug', flat=True)
+        return [
+            *(f'profile:{username}' for username in usernames),
+            *(f'author:{pk}' for pk in author_ids),
+            *(f'group:{slug}' for slug in slugs),
+        ]
@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .uploads import validate_upload_size
+
 User = get_user_model()
 
 
@@ -40,7 +42,9 @@ class Post(models.Model):
         on_delete=models.CASCADE,
         verbose_name='Автор поста',
         blank=True, null=True,
-        related_name='posts'
+        related_name='posts',
+        # Покрывается составным индексом (author, pub_date, id).
+        db_index=False
     )
     group = models.ForeignKey(
         Group,
@@ -49,22 +53,54 @@ class Post(models.Model):
         blank=True,
         null=True,
         verbose_name='Группа',
-        help_text='Выберите группу'
+        help_text='Выберите группу',
+        # Покрывается составным индексом (group, pub_date, id).
+        db_index=False
     )
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
-        blank=True
+        blank=True,
+        validators=[validate_upload_size]
+    )
+    comments_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False
     )
 
     class Meta:
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        # Индексы повторяют порядок лент: главной, группы и профиля.
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'], name='post_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_date_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        # comments_count меняется только UPDATE с F() из сигналов, поэтому
+        # устаревшее значение из памяти не должно затирать счётчик в базе.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'comments_count'
+            ]
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -74,7 +110,9 @@ class Comment(models.Model):
         blank=True,
         null=True,
         verbose_name='Пост',
-        help_text='Комментарий к посту'
+        help_text='Комментарий к посту',
+        # Покрывается индексом (post, created).
+        db_index=False
     )
     author = models.ForeignKey(
         User,
@@ -92,17 +130,98 @@ class Comment(models.Model):
         auto_now_add=True
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['post', 'created'], name='comment_post_created_idx'
+            ),
+            # Для фильтра по дате в админке
+            models.Index(fields=['created'], name='comment_created_idx'),
+        ]
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name='follower',
-        blank=True
+        blank=True,
+        # Покрывается уникальным индексом (user, author).
+        db_index=False
     )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name='following',
-        blank=True
+        blank=True,
+        # Покрывается индексом (author, user).
+        db_index=False
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_follow'
+            ),
+        ]
+        indexes = [
+            # Рассылка постов подписчикам читает только этот индекс.
+            models.Index(fields=['author', 'user'], name='follow_author_idx'),
+        ]
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, обновляемые сигналами."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField('Количество постов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Количество подписчиков', default=0
     )
+    following_count = models.PositiveIntegerField(
+        'Количество подписок', default=0
+    )
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+
+class TimelineEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик',
+        # Покрывается индексами (user, post) и (user, pub_date, post).
+        db_index=False
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    # Копия Post.pub_date, чтобы лента читалась одним проходом по индексу.
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_timeline_entry'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_date_idx'
+            ),
+        ]
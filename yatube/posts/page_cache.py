@@ -0,0 +1,199 @@
+import hashlib
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from core.timing import record_cache
+
+VERSION_PREFIX = 'page-version'
+PAGE_PREFIX = 'page'
+LINKED_PREFIX = 'page-linked'
+
+
+def _version_key(tag):
+    # В тегах бывают слаги и имена с пробелами и кириллицей, которые
+    # memcached не принимает в ключах.
+    return f'{VERSION_PREFIX}:{hashlib.md5(tag.encode()).hexdigest()}'
+
+
+def _new_version():
+    # Время смены версии хранится в ней самой: из него считается
+    # Last-Modified страницы.
+    return f'{int(time.time()):x}.{uuid.uuid4().hex}'
+
+
+def version_time(version):
+    """Время появления версии в секундах или None для старого формата."""
+    try:
+        return int(version.split('.', 1)[0], 16) if '.' in version else None
+    except ValueError:
+        return None
+
+
+def get_versions(tags):
+    """Возвращает текущие версии тегов, заводя недостающие."""
+    keys = [_version_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    missing = {
+        key: _new_version() for key in keys if key not in versions
+    }
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def invalidate(*tags):
+    """Сбрасывает все закэшированные страницы с указанными тегами."""
+    tags = {tag for tag in tags if tag}
+    if tags:
+        cache.set_many(
+            {_version_key(tag): _new_version() for tag in tags}, None
+        )
+
+
+def linked_tags(tag, get_linked):
+    """Тег `tag` и теги, которые get_linked() находит по базе.
+
+    Результат get_linked кэшируется до смены версии `tag`, поэтому
+    сигналам достаточно сбросить `tag`, когда меняется сам набор, а
+    повторные запросы страницы базу не читают.
+    """
+    version, = get_versions([tag])
+    digest = hashlib.md5(tag.encode()).hexdigest()
+    key = f'{LINKED_PREFIX}:{digest}:{version}'
+    linked = cache.get(key)
+    if linked is None:
+        linked = get_linked()
+        cache.set(key, linked, settings.PAGE_CACHE_TIMEOUT)
+    return [tag, *linked]
+
+
+def _page_key(request, tags):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    versions = '.'.join(get_versions(tags))
+    return f'{PAGE_PREFIX}:{path}:{versions}'
+
+
+def _is_cacheable(request):
+    return (
+        request.method in ('GET', 'HEAD')
+        and settings.PAGE_CACHE_BYPASS_COOKIE not in request.COOKIES
+        and not request.user.is_authenticated
+    )
+
+
+def anonymous_page_cache(get_tags):
+    """Кэширует страницу для анонимных посетителей.
+
+    `get_tags` получает аргументы view и возвращает теги страницы;
+    сигналы моделей сбрасывают кэш по этим тегам через `invalidate`.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not _is_cacheable(request):
+                return view_func(request, *args, **kwargs)
+            key = _page_key(request, get_tags(*args, **kwargs))
+            response = cache.get(key)
+            if response is not None:
+                record_cache('page', hits=1)
+                return response
+            record_cache('page', misses=1)
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200 and not response.cookies:
+                cache.set(key, response, settings.PAGE_CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
+
+
+def _validators(request, tags):
+    """ETag и Last-Modified страницы по версиям её тегов, без запросов к БД.
+
+    Для вошедшего пользователя в ETag входят его имя и CSRF-cookie: от них
+    зависят шапка и формы страницы. Last-Modified отдаётся только
+    анонимам, потому что вход и выход его не меняют.
+    """
+    versions = get_versions(tags)
+    user = request.user
+    parts = [
+        *versions,
+        str(user.pk) if user.is_authenticated else '',
+        user.get_username() if user.is_authenticated else '',
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+    ]
+    etag = hashlib.md5('|'.join(parts).encode()).hexdigest()
+    last_modified = None
+    if not user.is_authenticated:
+        times = [version_time(version) for version in versions]
+        if times and None not in times:
+            last_modified = max(times)
+    return quote_etag(etag), last_modified
+
+
+def conditional_page(get_tags):
+    """Отвечает 304 Not Modified, если у клиента актуальная страница.
+
+    Валидаторы считаются по версиям тегов страницы до запуска view, так
+    что при повторной проверке страница не рендерится и база не читается.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+            etag, last_modified = _validators(
+                request, get_tags(*args, **kwargs)
+            )
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is not None:
+                return response
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200:
+                response['ETag'] = etag
+                if last_modified is not None:
+                    response['Last-Modified'] = http_date(last_modified)
+            return response
+        return wrapper
+    return decorator
+
+
+def cached_page(get_tags):
+    """conditional_page и anonymous_page_cache с общими тегами."""
+    def decorator(view_func):
+        return conditional_page(get_tags)(
+            anonymous_page_cache(get_tags)(view_func)
+        )
+    return decorator
+
+
+def mark_written(request):
+    """Отмечает, что view сохранил изменения; см. read_your_writes."""
+    request.page_cache_written = True
+
+
+def read_your_writes(view_func):
+    """После успешной записи отключает кэш страниц для её автора.
+
+    Другие процессы могут ещё отдавать старую копию страницы, поэтому
+    автор изменения на время жизни кэша получает свежие страницы.
+    Запись считается сделанной, только если view вызвал mark_written.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        response = view_func(request, *args, **kwargs)
+        if getattr(request, 'page_cache_written', False):
+            response.set_cookie(
+                settings.PAGE_CACHE_BYPASS_COOKIE, '1',
+                max_age=settings.PAGE_CACHE_TIMEOUT, httponly=True,
+            )
+        return response
+    return wrapper
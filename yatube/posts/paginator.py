@@ -0,0 +1,185 @@
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db import connection, models
+from django.db.models import Max, Q
+from django.utils.functional import cached_property
+from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+
+def encode_cursor(pub_date, pk):
+    """Упаковывает позицию в ленте в непрозрачный токен для URL.
+
+    Для списков без даты pub_date равна None.
+    """
+    date = pub_date.isoformat() if pub_date is not None else ''
+    return urlsafe_base64_encode(force_bytes(f'{date}|{pk}'))
+
+
+def decode_cursor(token):
+    """Распаковывает токен; для битого токена возвращает None."""
+    try:
+        raw = urlsafe_base64_decode(token).decode()
+        pub_date, pk = raw.rsplit('|', 1)
+        pk = int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        return None
+    if not pub_date:
+        return None, pk
+    pub_date = parse_datetime(pub_date)
+    if pub_date is None:
+        return None
+    return pub_date, pk
+
+
+class CursorPaginator(Paginator):
+    """Пагинация по ключу (pub_date, id) без COUNT(*) и OFFSET.
+
+    Страница выбирается условием WHERE по индексируемым полям, поэтому
+    любая страница стоит столько же, сколько первая, а новые посты не
+    сдвигают уже открытые страницы. С date_field=None список идёт
+    только по ключу, например для групп.
+    """
+
+    def __init__(self, object_list, per_page, date_field='pub_date',
+                 pk_field='id'):
+        super().__init__(object_list, per_page)
+        self.date_field = date_field
+        self.pk_field = pk_field
+
+    def _check_object_list_is_ordered(self):
+        # Порядок страницы всегда задаётся в get_page.
+        pass
+
+    def decode(self, token):
+        """Позиция из токена или None, если он битый или от другого списка."""
+        position = decode_cursor(token) if token else None
+        if position is None:
+            return None
+        if (position[0] is None) != (self.date_field is None):
+            return None
+        return position
+
+    def _ordering(self, descending):
+        fields = [self.date_field, self.pk_field]
+        return [
+            f'-{field}' if descending else field
+            for field in fields if field is not None
+        ]
+
+    # Условие записано как диапазон по дате с исключением границы, а не
+    # через OR: так SQLite ищет по составному индексу, а не сканирует его.
+    def _older_than(self, pub_date, pk):
+        if self.date_field is None:
+            return Q(**{f'{self.pk_field}__lt': pk})
+        return (
+            Q(**{f'{self.date_field}__lte': pub_date})
+            & ~Q(**{self.date_field: pub_date, f'{self.pk_field}__gte': pk})
+        )
+
+    def _newer_than(self, pub_date, pk):
+        if self.date_field is None:
+            return Q(**{f'{self.pk_field}__gt': pk})
+        return (
+            Q(**{f'{self.date_field}__gte': pub_date})
+            & ~Q(**{self.date_field: pub_date, f'{self.pk_field}__lte': pk})
+        )
+
+    def _cursor_for(self, obj):
+        # Строки queryset.values() приходят словарями.
+        get = obj.get if isinstance(obj, dict) else (
+            lambda name: getattr(obj, name))
+        pub_date = get(self.date_field) if self.date_field else None
+        return encode_cursor(pub_date, get(self.pk_field))
+
+    def get_page(self, after=None, before=None):
+        """Возвращает страницу после токена `after` или перед `before`."""
+        queryset = self.object_list
+        limit = self.per_page + 1
+        after = self.decode(after)
+        before = self.decode(before)
+
+        if before is not None:
+            rows = list(
+                queryset.filter(self._newer_than(*before))
+                .order_by(*self._ordering(descending=False))[:limit]
+            )
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            has_next = True
+        else:
+            if after is not None:
+                queryset = queryset.filter(self._older_than(*after))
+            rows = list(
+                queryset.order_by(*self._ordering(descending=True))[:limit]
+            )
+            has_next = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            has_previous = after is not None
+
+        page = Page(rows, None, self)
+        page.next_cursor = (
+            self._cursor_for(rows[-1]) if has_next and rows else None
+        )
+        page.previous_cursor = (
+            self._cursor_for(rows[0]) if has_previous and rows else None
+        )
+        return page
+
+    def get_since(self, since):
+        """Записи новее позиции `since` от старых к новым.
+
+        Нужна для догрузки изменений: клиент передаёт since_cursor
+        предыдущего ответа и получает только новые записи.
+        """
+        rows = list(
+            self.object_list.filter(self._newer_than(*since))
+            .order_by(*self._ordering(descending=False))[:self.per_page + 1]
+        )
+        page = Page(rows[:self.per_page], None, self)
+        page.has_more = len(rows) > self.per_page
+        page.since_cursor = (
+            self._cursor_for(page.object_list[-1]) if page.object_list
+            else encode_cursor(*since)
+        )
+        return page
+
+
+def estimate_count(model):
+    """Оценивает число строк таблицы модели без COUNT(*).
+
+    В PostgreSQL берётся статистика планировщика, в остальных базах —
+    максимальный автоинкрементный ключ, который находится по индексу и
+    не меньше настоящего числа строк. Для других ключей возвращает None.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE relname = %s',
+                [model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return int(row[0]) if row and row[0] >= 0 else None
+    if not isinstance(model._meta.pk, models.AutoField):
+        return None
+    return model._default_manager.aggregate(Max('pk'))['pk__max'] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор админки, который не считает строки большой таблицы.
+
+    Для списка без фильтров число строк оценивается через
+    estimate_count, если оценка больше ADMIN_EXACT_COUNT_LIMIT. Списки
+    с поиском и фильтрами считаются точно.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, models.QuerySet) and not queryset.query.where:
+            estimate = estimate_count(queryset.model)
+            if (estimate is not None
+                    and estimate > settings.ADMIN_EXACT_COUNT_LIMIT):
+                return estimate
+        return super().count
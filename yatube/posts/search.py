@@ -0,0 +1,149 @@
+"""Полнотекстовый поиск по постам и комментариям на SQLite FTS5.
+
+Посты и комментарии лежат в одной таблице posts_search. rowid строки
+вычисляется из первичного ключа (2 * id для поста, 2 * id + 1 для
+комментария), поэтому обновление и удаление идут по rowid без просмотра
+таблицы.
+"""
+import re
+
+from django.db import connection
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+TABLE = 'posts_search'
+
+# Подзапросы для фильтрации по совпадениям, например в админке.
+POST_IDS_SQL = (
+    f'SELECT rowid / 2 FROM {TABLE} '
+    f'WHERE {TABLE} MATCH %s AND rowid & 1 = 0'
+)
+COMMENT_IDS_SQL = (
+    f'SELECT rowid / 2 FROM {TABLE} '
+    f'WHERE {TABLE} MATCH %s AND rowid & 1 = 1'
+)
+
+WORD_RE = re.compile(r'\w+')
+
+
+def is_enabled():
+    return connection.vendor == 'sqlite'
+
+
+def post_rowid(pk):
+    return pk * 2
+
+
+def comment_rowid(pk):
+    return pk * 2 + 1
+
+
+def build_query(text):
+    """Превращает ввод пользователя в запрос FTS5.
+
+    Каждое слово берётся в кавычки, чтобы символы синтаксиса FTS5 не
+    ломали запрос, и ищется по префиксу. Без слов возвращает None.
+    """
+    words = WORD_RE.findall(text or '')
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def encode_cursor(rank, rowid):
+    return urlsafe_base64_encode(force_bytes(f'{rank!r}|{rowid}'))
+
+
+def decode_cursor(token):
+    """Распаковывает токен страницы; для битого токена возвращает None."""
+    try:
+        rank, rowid = urlsafe_base64_decode(token).decode().split('|')
+        return float(rank), int(rowid)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        return None
+
+
+def _replace(rows):
+    if not is_enabled() or not rows:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT OR REPLACE INTO {TABLE} (rowid, text, post_id) '
+            'VALUES (%s, %s, %s)',
+            rows,
+        )
+
+
+def _delete(rowids):
+    if not is_enabled() or not rowids:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {TABLE} WHERE rowid = %s',
+            [(rowid,) for rowid in rowids],
+        )
+
+
+def index_posts(posts):
+    _replace([(post_rowid(post.pk), post.text, post.pk) for post in posts])
+
+
+def index_comments(comments):
+    _replace([
+        (comment_rowid(comment.pk), comment.text, comment.post_id)
+        for comment in comments if comment.post_id is not None
+    ])
+
+
+def unindex_posts(pks):
+    _delete([post_rowid(pk) for pk in pks])
+
+
+def unindex_comments(pks):
+    _delete([comment_rowid(pk) for pk in pks])
+
+
+def rebuild():
+    """Перестраивает индекс целиком набором INSERT ... SELECT."""
+    if not is_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, text, post_id) '
+            'SELECT id * 2, text, id FROM posts_post'
+        )
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, text, post_id) '
+            'SELECT id * 2 + 1, text, post_id FROM posts_comment '
+            'WHERE post_id IS NOT NULL'
+        )
+
+
+def search(query, per_page, after=None):
+    """Возвращает страницу совпадений по релевантности.
+
+    Совпадения — пары (rowid, post_id), упорядоченные по rank FTS5.
+    Следующая страница выбирается по ключу (rank, rowid) без OFFSET,
+    как и в CursorPaginator.
+    """
+    if not is_enabled() or query is None:
+        return [], None
+    sql = f'SELECT rowid, post_id, rank FROM {TABLE} WHERE {TABLE} MATCH %s'
+    params = [query]
+    cursor_value = decode_cursor(after) if after else None
+    if cursor_value is not None:
+        rank, rowid = cursor_value
+        sql += ' AND (rank > %s OR (rank = %s AND rowid > %s))'
+        params += [rank, rank, rowid]
+    sql += ' ORDER BY rank, rowid LIMIT %s'
+    params.append(per_page + 1)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        rowid, _, rank = rows[-1]
+        next_cursor = encode_cursor(rank, rowid)
+    return [(rowid, post_id) for rowid, post_id, _ in rows], next_cursor
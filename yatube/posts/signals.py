@@ -0,0 +1,198 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from jobs.registry import enqueue
+
+from . import counters, page_cache, search, tasks
+from .thumbnails import schedule_thumbnails
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+def _profile_tag(user_id):
+    username = User.objects.filter(pk=user_id).values_list(
+        'username', flat=True).first()
+    return f'profile:{username}' if username else None
+
+
+def _profile_tags(*user_ids):
+    usernames = User.objects.filter(pk__in=user_ids).values_list(
+        'username', flat=True)
+    return [f'profile:{username}' for username in usernames]
+
+
+def _group_tag(group_id):
+    slug = Group.objects.filter(pk=group_id).values_list(
+        'slug', flat=True).first()
+    return f'group:{slug}' if slug else None
+
+
+def _post_tags(post):
+    return [
+        'index',
+        f'post:{post.pk}',
+        f'card:post:{post.pk}',
+        _profile_tag(post.author_id),
+        _group_tag(post.group_id),
+    ]
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, **kwargs):
+    if created and instance.author_id is not None:
+        counters.change_user_counters(instance.author_id, posts_count=1)
+        # Число постов автора показано на страницах всех его постов.
+        page_cache.invalidate(f'author:{instance.author_id}')
+        enqueue(tasks.fan_out_post, instance.pk)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_state(sender, instance, **kwargs):
+    instance._old_group_id = None
+    instance._old_image = None
+    if instance.pk is not None:
+        instance._old_group_id, instance._old_image = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('group_id', 'image').first()
+            or (None, None)
+        )
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, **kwargs):
+    old_group_id = getattr(instance, '_old_group_id', None)
+    tags = _post_tags(instance)
+    page_cache.invalidate(
+        *tags,
+        _group_tag(old_group_id) if old_group_id != instance.group_id
+        else None,
+    )
+    search.index_posts([instance])
+    image = instance.image.name
+    if image and image != getattr(instance, '_old_image', None):
+        transaction.on_commit(lambda: schedule_thumbnails(image, tags))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    if instance.author_id is not None:
+        counters.change_user_counters(instance.author_id, posts_count=-1)
+    search.unindex_posts([instance.pk])
+    page_cache.invalidate(
+        *_post_tags(instance), f'author:{instance.author_id}')
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.change_comments_count(instance.post_id, 1)
+    search.index_comments([instance])
+    page_cache.invalidate(f'post:{instance.post_id}')
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.change_comments_count(instance.post_id, -1)
+    search.unindex_comments([instance.pk])
+    page_cache.invalidate(f'post:{instance.post_id}')
+
+
+@receiver(pre_save, sender=Group)
+def remember_group_slug(sender, instance, **kwargs):
+    instance._old_slug = None
+    if instance.pk is not None:
+        instance._old_slug = Group.objects.filter(
+            pk=instance.pk).values_list('slug', flat=True).first()
+
+
+def _group_tags(group):
+    """Теги всех страниц, где видны название или адрес группы."""
+    return [
+        'index',
+        f'group:{group.slug}',
+        f'card:group:{group.pk}',
+        f'in-group:{group.pk}',
+        'groups',
+    ]
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    if created:
+        page_cache.invalidate(f'group:{instance.slug}')
+        return
+    old_slug = getattr(instance, '_old_slug', None)
+    page_cache.invalidate(
+        *_group_tags(instance),
+        f'group:{old_slug}' if old_slug else None,
+    )
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    page_cache.invalidate(*_group_tags(instance))
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        counters.change_user_counters(instance.author_id, followers_count=1)
+        counters.change_user_counters(instance.user_id, following_count=1)
+        enqueue(
+            tasks.backfill_timeline, instance.user_id, instance.author_id
+        )
+    # Профиль автора показывает подписчиков, профиль читателя — подписки.
+    page_cache.invalidate(
+        *_profile_tags(instance.author_id, instance.user_id))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.change_user_counters(instance.author_id, followers_count=-1)
+    counters.change_user_counters(instance.user_id, following_count=-1)
+    enqueue(tasks.remove_author, instance.user_id, instance.author_id)
+    page_cache.invalidate(
+        *_profile_tags(instance.author_id, instance.user_id))
+
+
+def _only_last_login(update_fields):
+    return update_fields is not None and set(update_fields) == {'last_login'}
+
+
+def _user_names(user):
+    return user.username, user.first_name, user.last_name
+
+
+@receiver(pre_save, sender=User)
+def remember_user_names(sender, instance, update_fields=None, **kwargs):
+    instance._old_names = None
+    if instance.pk is not None and not _only_last_login(update_fields):
+        instance._old_names = User.objects.filter(pk=instance.pk).values_list(
+            'username', 'first_name', 'last_name').first()
+
+
+def _author_tags(user):
+    """Теги всех страниц, где видны имя пользователя или ссылка на него."""
+    slugs = Post.objects.filter(author=user).exclude(group=None).values_list(
+        'group__slug', flat=True).distinct()
+    return [
+        'index',
+        *(f'group:{slug}' for slug in slugs),
+        f'author:{user.pk}',
+        f'commenter:{user.pk}',
+    ]
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        UserStats.objects.get_or_create(user=instance)
+    if _only_last_login(update_fields):
+        return
+    tags = [f'profile:{instance.username}', f'card:user:{instance.pk}']
+    old_names = getattr(instance, '_old_names', None)
+    if old_names is not None and old_names != _user_names(instance):
+        # Имя автора показано в ленте, группах и постах, а страница
+        # со старым адресом профиля должна перестать отдаваться.
+        tags += [f'profile:{old_names[0]}', *_author_tags(instance)]
+    page_cache.invalidate(*tags)
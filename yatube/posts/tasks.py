@@ -0,0 +1,28 @@
+"""Фоновые задачи постов: ведение лент подписок."""
+from jobs.registry import task
+
+from . import timeline
+from .models import Follow, Post
+
+
+@task
+def fan_out_post(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None and post.author_id is not None:
+        timeline.fan_out_post(post)
+
+
+# Подписка и отписка могут выполниться не в том порядке, в каком их
+# поставили в очередь, поэтому задачи сверяются с текущим состоянием.
+@task
+def backfill_timeline(user_id, author_id):
+    if Follow.objects.filter(user_id=user_id, author_id=author_id).exists():
+        timeline.backfill_timeline(user_id, author_id)
+
+
+@task
+def remove_author(user_id, author_id):
+    if not Follow.objects.filter(
+        user_id=user_id, author_id=author_id
+    ).exists():
+        timeline.remove_author(user_id, author_id)
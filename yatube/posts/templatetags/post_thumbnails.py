@@ -0,0 +1,11 @@
+from django import template
+
+from ..thumbnails import lookup_thumbnail
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(image):
+    """Готовая миниатюра картинки поста или None, пока она создаётся."""
+    return lookup_thumbnail(image)
@@ -0,0 +1,167 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import search
+from ..models import (Comment, Follow, Group, Post, TimelineEntry,
+                      UserStats)
+
+User = get_user_model()
+
+
+class AdminChangelistTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        self.client.force_login(self.admin)
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        self.posts = [
+            Post.objects.create(
+                author=self.admin, group=self.group, text=f'Пост {number}')
+            for number in range(3)
+        ]
+        Comment.objects.create(
+            post=self.posts[0], author=self.admin, text='Комментарий')
+
+    @override_settings(ADMIN_EXACT_COUNT_LIMIT=0)
+    def test_unfiltered_count_is_estimated(self):
+        self.posts[0].delete()
+        url = reverse('admin:posts_post_changelist')
+        response = self.client.get(url)
+        # Оценка по максимальному ключу, а не COUNT(*).
+        self.assertEqual(response.context['cl'].result_count, 3)
+        response = self.client.get(url, {'group__id__exact': self.group.pk})
+        self.assertEqual(response.context['cl'].result_count, 2)
+
+    def test_small_table_is_counted_exactly(self):
+        self.posts[0].delete()
+        response = self.client.get(reverse('admin:posts_post_changelist'))
+        self.assertEqual(response.context['cl'].result_count, 2)
+
+    def test_changelist_query_count_does_not_grow_with_rows(self):
+        url = reverse('admin:posts_post_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        for number in range(5):
+            group = Group.objects.create(
+                title=f'Группа {number}', slug=f'group-{number}')
+            Post.objects.create(
+                author=self.admin, group=group, text=f'Ещё {number}')
+        with self.assertNumQueries(len(queries)):
+            self.client.get(url)
+
+    def test_date_filter_does_not_scan_dates(self):
+        url = reverse('admin:posts_post_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'pub_date__gte': '2000-01-01'})
+        self.assertEqual(response.context['cl'].result_count, 3)
+        self.assertFalse(any(
+            'DISTINCT' in query['sql'] for query in queries.captured_queries
+        ))
+
+    def test_comment_filters(self):
+        other = User.objects.create_user(username='other')
+        Comment.objects.create(
+            post=self.posts[1], author=other, text='Чужой комментарий')
+        url = reverse('admin:posts_comment_changelist')
+        response = self.client.get(url)
+        self.assertContains(response, 'name="author"')
+        self.assertContains(response, 'created__gte=')
+        response = self.client.get(url, {'author': 'other', 'q': 'Чужой'})
+        self.assertEqual(
+            [comment.author for comment in response.context['cl'].result_list],
+            [other],
+        )
+        self.assertContains(
+            response, 'type="hidden" name="q" value="Чужой"')
+        response = self.client.get(
+            url, {'author': 'other', 'created__gte': '2999-01-01'})
+        self.assertEqual(response.context['cl'].result_count, 0)
+
+    def test_foreign_keys_use_autocomplete(self):
+        for url in (
+            reverse('admin:posts_post_change', args=[self.posts[0].pk]),
+            reverse('admin:posts_comment_add'),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, 'admin-autocomplete')
+
+
+@override_settings(BULK_BATCH_SIZE=2)
+class BulkActionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.posts = [
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+            for number in range(5)
+        ]
+        self.kept = Post.objects.create(author=self.admin, text='Чужой пост')
+        self.comments = [
+            Comment.objects.create(
+                post=post, author=self.admin, text=f'Ответ {post.pk}')
+            for post in (self.posts[0], self.posts[0], self.kept)
+        ]
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:posts_post_changelist')
+
+    def test_move_and_clear_group(self):
+        group_url = reverse('posts:group_list', args=[self.group.slug])
+        self.assertNotContains(self.client_class().get(group_url), 'Пост 0')
+        self.client.post(self.url, {
+            'action': 'move_to_group',
+            'group': self.group.slug,
+            'select_across': '1',
+            'index': 0,
+            '_selected_action': [self.posts[0].pk],
+        }, QUERY_STRING='author=author')
+        self.assertEqual(self.group.group_posts.count(), 5)
+        self.assertContains(self.client_class().get(group_url), 'Пост 0')
+
+        self.client.post(self.url, {
+            'action': 'clear_group',
+            'index': 0,
+            '_selected_action': [post.pk for post in self.posts[:3]],
+        })
+        self.assertEqual(self.group.group_posts.count(), 2)
+
+    def test_delete_posts_cleans_up_related_data(self):
+        data = {
+            'action': 'delete_in_bulk',
+            'index': 0,
+            '_selected_action': [post.pk for post in self.posts],
+        }
+        response = self.client.post(self.url, data)
+        self.assertContains(response, 'Да, удалить')
+        self.assertEqual(Post.objects.count(), 6)
+
+        self.client.post(self.url, {**data, 'post': 'yes'})
+        self.assertEqual(list(Post.objects.all()), [self.kept])
+        self.assertEqual(
+            list(Comment.objects.all()), [self.comments[2]])
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).posts_count, 0)
+        hits, _ = search.search(search.build_query('пост'), 10)
+        self.assertEqual([post_id for _, post_id in hits], [self.kept.pk])
+
+    def test_delete_comments_updates_counters(self):
+        self.client.post(reverse('admin:posts_comment_changelist'), {
+            'action': 'delete_in_bulk',
+            'index': 0,
+            'post': 'yes',
+            '_selected_action': [self.comments[0].pk],
+        })
+        self.posts[0].refresh_from_db()
+        self.assertEqual(self.posts[0].comments_count, 1)
+        self.assertEqual(Comment.objects.count(), 2)
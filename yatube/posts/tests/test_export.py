@@ -0,0 +1,90 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.other = User.objects.create_user(username='other')
+        group = Group.objects.create(title='Группа', slug='group')
+        self.posts = [
+            Post.objects.create(
+                author=self.author, group=group, text=f'Пост {number}')
+            for number in range(3)
+        ]
+        Post.objects.create(author=self.other, text='Чужой пост')
+        Comment.objects.create(
+            post=self.posts[0], author=self.other, text='Комментарий')
+        Follow.objects.create(user=self.other, author=self.author)
+
+    def test_export_view_streams_own_posts(self):
+        self.client.force_login(self.author)
+        response = self.client.get(reverse('posts:export_posts'))
+        self.assertTrue(response.streaming)
+        rows = [
+            json.loads(line)
+            for line in b''.join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual(
+            [row['text'] for row in rows], [post.text for post in self.posts])
+        self.assertEqual(rows[0]['author'], 'author')
+        self.assertEqual(rows[0]['group'], 'group')
+
+    def test_export_view_gzip_csv(self):
+        self.client.force_login(self.author)
+        response = self.client.get(
+            reverse('posts:export_posts'), {'format': 'csv', 'gzip': '1'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        content = gzip.decompress(b''.join(response.streaming_content))
+        lines = content.decode().splitlines()
+        self.assertEqual(lines[0], 'id,author,group,text,pub_date')
+        self.assertEqual(len(lines), 4)
+
+    def test_export_view_requires_login(self):
+        response = self.client.get(reverse('posts:export_posts'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_export_command(self):
+        out = StringIO()
+        call_command('export_data', 'follows', stdout=out)
+        self.assertEqual(
+            json.loads(out.getvalue()), {'user': 'other', 'author': 'author'})
+
+        path = os.path.join(TEMP_DIR, 'comments.csv.gz')
+        call_command(
+            'export_data', 'comments', '--format=csv', '--gzip',
+            f'--output={path}', '--chunk-size=1',
+        )
+        with gzip.open(path, 'rt') as file:
+            lines = file.read().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn('Комментарий', lines[1])
+
+    def test_exported_posts_can_be_imported(self):
+        path = os.path.join(TEMP_DIR, 'posts.jsonl')
+        call_command('export_data', 'posts', f'--output={path}')
+        Post.objects.all().delete()
+        call_command('import_posts', path, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 4)
+        self.assertEqual(self.author.posts.count(), 3)
@@ -1,11 +1,14 @@
 import shutil
 import tempfile
+from io import BytesIO
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
 from ..models import Comment, Group, Post
 
@@ -181,3 +184,73 @@ class PostCreateFormTests(TestCase):
                 group=self.group
             ).exists()
         )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostImageUploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    @staticmethod
+    def get_image(name, size, image_format='JPEG'):
+        content = BytesIO()
+        Image.new('RGB', size).save(content, image_format)
+        return SimpleUploadedFile(name, content.getvalue())
+
+    def create_post(self, image):
+        return self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Текст с картинкой', 'image': image},
+        )
+
+    @override_settings(POST_IMAGE_MAX_SIDE=100)
+    def test_large_image_is_downsized(self):
+        self.create_post(self.get_image('large.jpg', (400, 200)))
+        post = Post.objects.get(text='Текст с картинкой')
+        self.assertEqual((post.image.width, post.image.height), (100, 50))
+
+    @override_settings(UPLOAD_MAX_BYTES=1024)
+    def test_too_big_file_is_rejected(self):
+        response = self.create_post(self.get_image('big.bmp', (50, 50), 'BMP'))
+        self.assertFormError(
+            response, 'form', 'image', 'Файл больше 1,0\xa0КБ.')
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=100)
+    def test_too_many_pixels_are_rejected(self):
+        response = self.create_post(self.get_image('wide.jpg', (20, 20)))
+        self.assertFormError(
+            response, 'form', 'image',
+            'Слишком большое изображение: 20×20.')
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(
+        POST_IMAGE_MAX_PIXELS=1000, POST_IMAGE_MAX_DECODED_PIXELS=100)
+    def test_lower_pixel_limit_for_formats_without_draft(self):
+        response = self.create_post(
+            self.get_image('wide.png', (20, 20), 'PNG'))
+        self.assertFormError(
+            response, 'form', 'image',
+            'Слишком большое изображение: 20×20.')
+        self.create_post(self.get_image('wide.jpg', (20, 20)))
+        self.assertTrue(Post.objects.exists())
+
+    def test_model_rejects_truncated_upload(self):
+        # Любая форма модели, включая админку, проверяет размер загрузки.
+        image = self.get_image('big.jpg', (300, 300))
+        image.too_large = True
+        post = Post(author=self.user, text='Текст с картинкой', image=image)
+        with self.assertRaises(ValidationError) as error:
+            post.full_clean()
+        self.assertIn('image', error.exception.message_dict)
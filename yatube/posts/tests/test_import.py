@@ -0,0 +1,111 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from .. import search
+from ..models import Comment, Follow, Group, Post, TimelineEntry, UserStats
+
+User = get_user_model()
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class ImportPostsTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.create(author=self.author, text='Старый пост')
+
+    def write(self, name, content):
+        path = os.path.join(TEMP_DIR, name)
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            file.write(content)
+        return path
+
+    def run_import(self, path, *args):
+        out, err = StringIO(), StringIO()
+        call_command('import_posts', path, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_jsonl(self):
+        records = [
+            {
+                'author': 'author',
+                'group': 'group',
+                'text': f'Импорт {number}',
+                'pub_date': f'2020-01-0{number + 1}T10:00:00',
+                'comments': [
+                    {'author': 'reader', 'text': 'Отличный пост'},
+                ],
+            }
+            for number in range(3)
+        ]
+        lines = [json.dumps(record) for record in records]
+        lines += ['{битый json', json.dumps({'author': 'nobody', 'text': 'x'})]
+        out, err = self.run_import(
+            self.write('posts.jsonl', '\n'.join(lines)), '--batch-size=2')
+
+        self.assertIn('Постов: 3, комментариев: 3', out)
+        self.assertEqual(err.count('пропущена'), 2)
+        posts = Post.objects.filter(text__startswith='Импорт')
+        self.assertEqual(posts.count(), 3)
+        post = posts.get(text='Импорт 0')
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(
+            (post.pub_date.year, post.pub_date.month, post.pub_date.day),
+            (2020, 1, 1))
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(post.comments.get().author, self.reader)
+        self.assertEqual(Comment.objects.count(), 3)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 4)
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).posts_count, 4)
+        hits, _ = search.search(search.build_query('импорт'), 10)
+        self.assertEqual(len(hits), 3)
+        # Новые посты после импорта получают свободные ключи.
+        Post.objects.create(author=self.author, text='После импорта')
+
+    def test_bad_comments_are_reported(self):
+        record = {
+            'author': 'author',
+            'text': 'С комментариями',
+            'comments': [
+                {'author': 'reader', 'text': 'Хороший'},
+                {'author': 'nobody', 'text': 'Чужой'},
+                {'author': 'reader', 'text': ''},
+            ],
+        }
+        out, err = self.run_import(
+            self.write('comments.jsonl', json.dumps(record)))
+        self.assertIn('Строка 1, комментарий 2 пропущен', err)
+        self.assertIn('Строка 1, комментарий 3 пропущен', err)
+        self.assertIn('комментариев: 2', out)
+        post = Post.objects.get(text='С комментариями')
+        self.assertEqual(post.comments_count, 1)
+
+    def test_import_csv(self):
+        stream = StringIO()
+        writer = csv.DictWriter(stream, ['author', 'text', 'group'])
+        writer.writeheader()
+        writer.writerow({'author': 'author', 'text': 'Из CSV', 'group': ''})
+        writer.writerow(
+            {'author': 'author', 'text': 'Чужая', 'group': 'missing'})
+        out, err = self.run_import(self.write('posts.csv', stream.getvalue()))
+        self.assertTrue(Post.objects.filter(text='Из CSV').exists())
+        self.assertIn('Строка 3 пропущена', err)
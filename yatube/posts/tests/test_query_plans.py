@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class QueryPlanTests(TestCase):
+    """Запросы страниц с постами идут по индексам, без сортировки в памяти."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+        for _ in range(15):
+            cls.post = Post.objects.create(
+                author=cls.author, text='Тестовый текст', group=cls.group)
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def get_plans(self, url):
+        with CaptureQueriesContext(connection) as context:
+            self.authorized_client.get(url)
+        plans = {}
+        with connection.cursor() as cursor:
+            for query in context.captured_queries:
+                sql = query['sql']
+                if not sql.startswith('SELECT'):
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                plans[sql] = [row[-1] for row in cursor.fetchall()]
+        return plans
+
+    def assert_uses_indexes(self, url):
+        for sql, plan in self.get_plans(url).items():
+            for step in plan:
+                with self.subTest(url=url, sql=sql, step=step):
+                    self.assertNotIn('TEMP B-TREE', step)
+                    if step.startswith('SCAN'):
+                        self.assertIn('INDEX', step)
+
+    def test_views_use_indexes(self):
+        first_page = reverse('posts:index')
+        next_cursor = self.client.get(first_page).context[
+            'page_obj'].next_cursor
+        urls = [
+            first_page,
+            first_page + '?after=' + next_cursor,
+            first_page + '?before=' + next_cursor,
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug})
+            + '?after=' + next_cursor,
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:profile', kwargs={'username': 'author'})
+            + '?after=' + next_cursor,
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:follow_index'),
+            reverse('posts:follow_index') + '?after=' + next_cursor,
+        ]
+        for url in urls:
+            self.assert_uses_indexes(url)
@@ -0,0 +1,85 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import search
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='auth')
+        self.post = Post.objects.create(
+            author=self.user, text='Прогулка по весеннему лесу')
+        self.other = Post.objects.create(
+            author=self.user, text='Рецепт яблочного пирога')
+        self.comment = Comment.objects.create(
+            post=self.other, author=self.user,
+            text='Лесные ягоды тоже подойдут')
+
+    def found_post_ids(self, text):
+        hits, _ = search.search(search.build_query(text), 10)
+        return {post_id for _, post_id in hits}
+
+    def test_index_follows_posts_and_comments(self):
+        self.assertEqual(self.found_post_ids('ЛЕС'), {
+            self.post.pk, self.other.pk})
+        self.post.text = 'Прогулка по парку'
+        self.post.save()
+        self.assertEqual(self.found_post_ids('лес'), {self.other.pk})
+        self.comment.delete()
+        self.assertEqual(self.found_post_ids('лес'), set())
+        self.other.delete()
+        self.assertEqual(self.found_post_ids('пирог'), set())
+
+    def test_query_syntax_is_escaped(self):
+        self.assertIsNone(search.build_query(' "*( '))
+        self.assertEqual(
+            self.found_post_ids('яблоч* "пирог ('), {self.other.pk})
+
+    def test_search_is_paginated_by_cursor(self):
+        for number in range(5):
+            Post.objects.create(author=self.user, text=f'Море {number}')
+        query = search.build_query('море')
+        seen = []
+        after = None
+        while True:
+            hits, after = search.search(query, 2, after=after)
+            seen += [post_id for _, post_id in hits]
+            if after is None:
+                break
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len(set(seen)), 5)
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {search.TABLE}')
+        self.assertEqual(self.found_post_ids('лес'), set())
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.found_post_ids('лес'), {
+            self.post.pk, self.other.pk})
+
+    def test_search_page(self):
+        response = self.client.get(reverse('posts:search'), {'q': 'ягоды'})
+        self.assertContains(response, self.other.text)
+        self.assertContains(response, self.comment.text)
+        self.assertNotContains(response, self.post.text)
+
+    def test_admin_search_uses_index(self):
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'весен'})
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.post])
+        response = self.client.get(
+            reverse('admin:posts_comment_changelist'), {'q': 'ягод'})
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.comment])
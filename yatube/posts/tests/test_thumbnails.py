@@ -0,0 +1,92 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post
+from ..thumbnails import (generate_thumbnails, lookup_thumbnail,
+                          resolve_thumbnails)
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.post = Post.objects.create(
+            author=self.user,
+            text='Тестовый текст',
+            image=SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF, content_type='image/gif'
+            ),
+        )
+
+    def test_page_shows_placeholder_until_thumbnail_ready(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        response = self.client.get(url)
+        self.assertContains(response, 'Картинка обрабатывается')
+        self.assertIsNone(lookup_thumbnail(self.post.image))
+
+    def test_lookup_finds_generated_thumbnail(self):
+        generate_thumbnails(self.post.image.name)
+        thumbnail = lookup_thumbnail(self.post.image)
+        self.assertIsNotNone(thumbnail)
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}))
+        self.assertContains(response, thumbnail.url)
+
+    def test_generate_thumbnails_command(self):
+        call_command('generate_thumbnails', '--inline', stdout=StringIO())
+        self.assertIsNotNone(lookup_thumbnail(self.post.image))
+
+    def test_resolve_thumbnails_batches_lookups(self):
+        posts = [self.post] + [
+            Post.objects.create(
+                author=self.user,
+                text='Тестовый текст',
+                image=SimpleUploadedFile(
+                    name=f'small{number}.gif',
+                    content=SMALL_GIF,
+                    content_type='image/gif'
+                ),
+            )
+            for number in range(3)
+        ]
+        generate_thumbnails(posts[0].image.name)
+        cache.clear()
+        images = [post.image for post in posts]
+        with self.assertNumQueries(1):
+            thumbnails = resolve_thumbnails(images)
+        self.assertIsNotNone(thumbnails[posts[0].image.name])
+        self.assertIsNone(thumbnails[posts[1].image.name])
+        with self.assertNumQueries(0):
+            cached = resolve_thumbnails(images)
+        self.assertEqual(
+            cached[posts[0].image.name].url,
+            thumbnails[posts[0].image.name].url,
+        )
@@ -1,15 +1,22 @@
 import shutil
 import tempfile
+import warnings
 
 from django import forms
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
+from django.core.cache.backends.base import CacheKeyWarning
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models import Count
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from ..models import Follow, Group, Post
+from .. import page_cache, timeline
+from ..card_cache import render_cards
+from ..models import Follow, Group, Post, TimelineEntry
 
 User = get_user_model()
 
@@ -199,6 +206,9 @@ class PaginatorViewsTest(TestCase):
                 text='Тестовый текст',
                 group=cls.group,)
 
+    def setUp(self):
+        cache.clear()
+
     def test_first_page_contains_ten_records(self):
         url_name = [
             reverse('posts:index'),
@@ -219,9 +229,42 @@ class PaginatorViewsTest(TestCase):
         ]
         for reverse_name in url_name:
             with self.subTest(reverse_name=reverse_name):
+                cache.clear()
+                response = self.client.get(reverse_name)
+                next_cursor = response.context['page_obj'].next_cursor
                 # Проверка: на второй странице должно быть три поста.
-                response = self.client.get((reverse_name) + '?page=2')
+                response = self.client.get(
+                    reverse_name + '?after=' + next_cursor)
                 self.assertEqual(len(response.context['page_obj']), 3)
+                self.assertIsNone(response.context['page_obj'].next_cursor)
+
+    def test_pages_stable_when_new_posts_arrive(self):
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        response = self.client.get(url)
+        next_cursor = response.context['page_obj'].next_cursor
+        Post.objects.create(
+            author=self.user,
+            text='Новый пост',
+            group=self.group,
+        )
+        response = self.client.get(url + '?after=' + next_cursor)
+        self.assertEqual(len(response.context['page_obj']), 3)
+
+    def test_previous_page_returns_first_page(self):
+        url = reverse('posts:profile', kwargs={'username': self.user.username})
+        first_page = self.client.get(url).context['page_obj']
+        second_page = self.client.get(
+            url + '?after=' + first_page.next_cursor).context['page_obj']
+        response = self.client.get(
+            url + '?before=' + second_page.previous_cursor)
+        self.assertEqual(
+            list(response.context['page_obj']), list(first_page))
+        self.assertIsNone(response.context['page_obj'].previous_cursor)
+
+    def test_broken_cursor_returns_first_page(self):
+        url = reverse('posts:profile', kwargs={'username': self.user.username})
+        response = self.client.get(url + '?after=broken')
+        self.assertEqual(len(response.context['page_obj']), 10)
 
 
 class PostVerificationTests(TestCase):
@@ -293,7 +336,7 @@ class PostVerificationTests(TestCase):
 
         )
         post_count_new = Post.objects.count()
-        response_1 = self.authorized_client.get(reverse('posts:index'))
+        response_1 = self.client.get(reverse('posts:index'))
         response_count = len(response_1.context['page_obj'])
         self.assertEqual(response_count, post_count_new)
         first_object = response_1.context['page_obj'][0]
@@ -304,11 +347,12 @@ class PostVerificationTests(TestCase):
         self.assertEqual(post_text_0, post_2.text)
 
         page_cached = response_1.content
-        post_2.delete()
-        response_2 = self.authorized_client.get(reverse('posts:index'))
+        # update() не посылает сигналов, поэтому страница остаётся в кэше.
+        Post.objects.filter(pk=post_2.pk).update(text='Изменённый текст')
+        response_2 = self.client.get(reverse('posts:index'))
         self.assertEqual(response_2.content, page_cached)
-        cache.clear()
-        response_3 = self.authorized_client.get(reverse('posts:index'))
+        post_2.delete()
+        response_3 = self.client.get(reverse('posts:index'))
         self.assertNotEqual(response_3.content, page_cached)
         response_count_last = len(response_3.context['page_obj'])
         self.assertEqual(response_count_last, post_count)
@@ -387,3 +431,355 @@ class PostVerificationTests(TestCase):
         post_text_0 = first_object.text
         self.assertNotEqual(post_author_0, new_post.author.username)
         self.assertNotEqual(post_text_0, new_post.text)
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        for _ in range(3):
+            Post.objects.create(author=cls.author, text='Тестовый текст')
+
+    def test_follow_backfills_timeline(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.reader.timeline.count(), 3)
+
+    def test_new_post_fans_out_to_followers(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+
+    def test_unfollow_removes_author_posts(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.filter(user=self.reader, author=self.author).delete()
+        self.assertFalse(self.reader.timeline.exists())
+
+    @override_settings(TIMELINE_LENGTH=2)
+    def test_timeline_is_bounded(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        entries = self.reader.timeline.order_by('-pub_date', '-post_id')
+        self.assertEqual(entries.count(), 2)
+        self.assertEqual(entries.first().post, post)
+
+    @override_settings(TIMELINE_LENGTH=2)
+    def test_fan_out_queries_do_not_depend_on_followers(self):
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        counts = []
+        for number in range(2):
+            for index in range(5):
+                follower = User.objects.create_user(
+                    username=f'follower{number}-{index}')
+                Follow.objects.create(user=follower, author=self.author)
+            with CaptureQueriesContext(connection) as context:
+                timeline.fan_out_post(post)
+            counts.append(len(context))
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(
+            TimelineEntry.objects.filter(user__username__startswith='follower')
+            .values('user').annotate(entries=Count('pk'))
+            .filter(entries__gt=2).count(),
+            0,
+        )
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый текст',
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_anonymous_page_is_cached(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertIsNone(response.context)
+
+    def test_authorized_page_is_not_cached(self):
+        url = reverse('posts:index')
+        self.authorized_client.get(url)
+        response = self.authorized_client.get(url)
+        self.assertIsNotNone(response.context)
+
+    def test_comment_invalidates_only_post_detail(self):
+        detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk})
+        index_url = reverse('posts:index')
+        self.client.get(detail_url)
+        self.client.get(index_url)
+        self.post.comments.create(author=self.user, text='Комментарий')
+        self.assertIsNotNone(self.client.get(detail_url).context)
+        self.assertIsNone(self.client.get(index_url).context)
+
+    def test_post_edit_invalidates_old_and_new_group(self):
+        old_url = reverse('posts:group_list', kwargs={'slug': 'test-slug'})
+        new_url = reverse('posts:group_list', kwargs={'slug': 'other-slug'})
+        self.client.get(old_url)
+        self.client.get(new_url)
+        self.post.group = self.other_group
+        self.post.save()
+        self.assertIsNotNone(self.client.get(old_url).context)
+        self.assertIsNotNone(self.client.get(new_url).context)
+
+    def test_writer_bypasses_page_cache(self):
+        url = reverse('posts:index')
+        self.client.get(url)
+        response = self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            data={'text': 'Комментарий'},
+        )
+        cookie = settings.PAGE_CACHE_BYPASS_COOKIE
+        self.assertIn(cookie, response.cookies)
+        # Автор записи видит свежие страницы и после выхода из аккаунта.
+        self.client.cookies[cookie] = response.cookies[cookie].value
+        self.assertIsNotNone(self.client.get(url).context)
+
+    def test_redirect_without_write_keeps_page_cache(self):
+        cookie = settings.PAGE_CACHE_BYPASS_COOKIE
+        response = self.client.get(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}))
+        self.assertEqual(response.status_code, 302)
+        self.assertNotIn(cookie, response.cookies)
+        response = self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            data={'text': ''},
+        )
+        self.assertNotIn(cookie, response.cookies)
+
+    def test_user_rename_invalidates_author_pages(self):
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+        ]
+        for url in urls:
+            self.client.get(url)
+        self.user.username = 'renamed'
+        self.user.save()
+        self.addCleanup(setattr, self.user, 'username', 'auth')
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertIsNotNone(self.client.get(url).context)
+
+    def test_commenter_rename_invalidates_post_detail(self):
+        commenter = User.objects.create_user(username='commenter')
+        self.post.comments.create(author=commenter, text='Комментарий')
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.client.get(url)
+        self.assertIsNone(self.client.get(url).context)
+        commenter.username = 'renamed-commenter'
+        commenter.save()
+        self.assertContains(self.client.get(url), 'renamed-commenter')
+
+    def test_group_rename_invalidates_posts_and_profiles(self):
+        urls = [
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+        ]
+        for url in urls:
+            self.client.get(url)
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.addCleanup(setattr, self.group, 'title', 'Тестовая группа')
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Новое название')
+
+    def test_non_ascii_tags(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', CacheKeyWarning)
+            page_cache.invalidate('group:Тестовый слаг')
+            page_cache.get_versions(['group:Тестовый слаг'])
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.post = Post.objects.create(author=self.user, text='Текст')
+        self.url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_revalidation_returns_not_modified_without_queries(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            self.url,
+            HTTP_IF_MODIFIED_SINCE=self.client.get(self.url)['Last-Modified'],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_invalidate_validators(self):
+        etag = self.client.get(self.url)['ETag']
+        self.post.comments.create(author=self.user, text='Комментарий')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_author_rename_invalidates_validators(self):
+        etag = self.client.get(self.url)['ETag']
+        self.user.username = 'renamed'
+        self.user.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, 'renamed')
+
+    def test_follow_invalidates_follower_profile(self):
+        url = reverse('posts:profile', kwargs={'username': 'auth'})
+        etag = self.client.get(url)['ETag']
+        author = User.objects.create_user(username='author')
+        Follow.objects.create(user=self.user, author=author)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['stats'].following_count, 1)
+
+    def test_new_post_invalidates_older_post_pages(self):
+        etag = self.client.get(self.url)['ETag']
+        Post.objects.create(author=self.user, text='Новый пост')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['count_post'], 2)
+
+    def test_authorized_user_gets_own_validators(self):
+        anonymous_etag = self.client.get(self.url)['ETag']
+        # Первый ответ выставляет CSRF-cookie, от которой зависит ETag.
+        self.authorized_client.get(self.url)
+        response = self.authorized_client.get(
+            self.url, HTTP_IF_NONE_MATCH=anonymous_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
+        response = self.authorized_client.get(
+            self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+
+class QueryCountTests(TestCase):
+    """Число запросов не зависит от количества постов на странице."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Тестовый текст', group=cls.group)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            self.authorized_client.get(url)
+        return len(context)
+
+    def add_posts_and_comments(self):
+        for number in range(settings.PAGE_POST):
+            user = User.objects.create_user(username=f'user{number}')
+            group = Group.objects.create(
+                title=f'Группа {number}',
+                slug=f'slug-{number}',
+                description='Тестовое описание'
+            )
+            Follow.objects.create(user=self.reader, author=user)
+            Post.objects.create(author=user, text='Текст', group=self.group)
+            Post.objects.create(
+                author=self.author, text='Текст', group=group)
+            self.post.comments.create(author=user, text='Комментарий')
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:follow_index'),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ]
+        before = [self.count_queries(url) for url in urls]
+        self.add_posts_and_comments()
+        for url, expected in zip(urls, before):
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), expected)
+
+
+class CardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            author=self.user, text='Тестовый текст', group=self.group)
+
+    def render(self):
+        posts = Post.objects.select_related('author', 'group')
+        return render_cards(posts)[0]
+
+    def test_card_is_cached(self):
+        self.render()
+        Post.objects.filter(pk=self.post.pk).update(text='Другой текст')
+        self.assertIn('Тестовый текст', self.render())
+
+    def test_post_edit_bumps_card_version(self):
+        self.render()
+        self.post.text = 'Другой текст'
+        self.post.save()
+        self.assertIn('Другой текст', self.render())
+
+    def test_group_edit_bumps_card_version(self):
+        self.render()
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertIn('Новое название', self.render())
+
+    def test_author_edit_bumps_card_version(self):
+        self.render()
+        self.user.first_name = 'Иван'
+        self.user.save()
+        self.assertIn('Иван', self.render())
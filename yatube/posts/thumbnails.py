@@ -0,0 +1,161 @@
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from core import metrics
+
+from . import page_cache
+
+logger = logging.getLogger(__name__)
+
+# Размеры, в которых шаблоны показывают картинки постов.
+POST_IMAGE = ('960x339', {'crop': 'center', 'upscale': True})
+THUMBNAIL_SIZES = [POST_IMAGE]
+
+_executor = None
+
+
+class LookupBackend(ThumbnailBackend):
+    """Бэкенд sorl, который умеет искать миниатюры, не создавая их."""
+
+    def get_thumbnail_file(self, file_, geometry_string, **options):
+        """ImageFile миниатюры с тем же именем, что даёт sorl."""
+        source = ImageFile(file_)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+    def lookup_many(self, files, geometry_string, **options):
+        """Ищет готовые миниатюры набора картинок, не создавая их.
+
+        Ключи всех миниатюр читаются из кэша sorl одним get_many, чего там
+        нет, дочитывается из таблицы sorl одним запросом и, как в самом
+        sorl, кладётся обратно в кэш.
+        Возвращает словарь {имя картинки: ImageFile или None}.
+        """
+        thumbnails = {
+            file_.name: self.get_thumbnail_file(
+                file_, geometry_string, **options)
+            for file_ in files if file_
+        }
+        kvstore = default.kvstore
+        if not isinstance(kvstore, cached_db_kvstore.KVStore):
+            return {
+                name: kvstore.get(thumbnail)
+                for name, thumbnail in thumbnails.items()
+            }
+        keys = {
+            name: add_prefix(thumbnail.key)
+            for name, thumbnail in thumbnails.items()
+        }
+        empty = cached_db_kvstore.EMPTY_VALUE
+        values = kvstore.cache.get_many(list(keys.values()))
+        missing = [key for key in keys.values() if key not in values]
+        if missing:
+            stored = dict(
+                KVStoreModel.objects.filter(key__in=missing)
+                .values_list('key', 'value')
+            )
+            fetched = {key: stored.get(key, empty) for key in missing}
+            kvstore.cache.set_many(
+                fetched, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT
+            )
+            values.update(fetched)
+        return {
+            name: deserialize_image_file(values[key])
+            if values[key] != empty else None
+            for name, key in keys.items()
+        }
+
+
+backend = LookupBackend()
+
+
+def resolve_thumbnails(images, size=POST_IMAGE):
+    """Готовые миниатюры для всех картинок страницы по их именам."""
+    geometry, options = size
+    return backend.lookup_many(images, geometry, **options)
+
+
+def lookup_thumbnail(image, size=POST_IMAGE):
+    if not image:
+        return None
+    return resolve_thumbnails([image], size).get(image.name)
+
+
+def generate_thumbnails(name):
+    """Создаёт все миниатюры картинки; выполняется в процессе пула."""
+    keys = []
+    for geometry, options in THUMBNAIL_SIZES:
+        thumbnail = backend.get_thumbnail(name, geometry, **options)
+        keys.append(add_prefix(thumbnail.key))
+    return keys
+
+
+def _generate_timed(name):
+    # Метрики процесса пула никто не читает, поэтому время возвращается
+    # вместе с результатом и учитывается в процессе сайта.
+    started = time.perf_counter()
+    keys = generate_thumbnails(name)
+    return keys, time.perf_counter() - started
+
+
+def _init_worker():
+    # Соединения с базой, унаследованные через fork, нельзя ни использовать,
+    # ни закрывать: SQLite это запрещает. Процесс откроет свои.
+    for connection in connections.all():
+        connection.connection = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            initializer=_init_worker,
+        )
+    return _executor
+
+
+def _finished(name, tags, future):
+    try:
+        keys, elapsed = future.result()
+    except Exception:
+        logger.exception('Не удалось создать миниатюры для %s', name)
+        return
+    metrics.THUMBNAIL_DURATION.observe(value=elapsed)
+    # Процесс пула записал миниатюры в базу, а в кэше этого процесса
+    # могла остаться отметка «миниатюры нет».
+    default.kvstore.cache.delete_many(keys)
+    page_cache.invalidate(*tags)
+
+
+def schedule_thumbnails(name, tags=()):
+    """Ставит создание миниатюр в пул процессов.
+
+    Когда миниатюры готовы, сбрасываются кэши страниц с тегами `tags`,
+    и вместо заглушки начинает показываться картинка.
+    """
+    future = _get_executor().submit(_generate_timed, name)
+    future.add_done_callback(
+        lambda future: _finished(name, list(tags), future)
+    )
+    return future
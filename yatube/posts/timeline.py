@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.db import connection
+
+from .models import Follow, Post, TimelineEntry, User
+
+
+def trim_timelines(users):
+    """Оставляет в лентах пользователей не больше TIMELINE_LENGTH записей.
+
+    `users` — запрос с одним столбцом id пользователей. Все ленты
+    обрезаются одним DELETE, сколько бы пользователей ни было.
+    """
+    table = connection.ops.quote_name(TimelineEntry._meta.db_table)
+    users_sql, users_params = users.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {table} WHERE id IN ('
+            'SELECT id FROM ('
+            'SELECT id, ROW_NUMBER() OVER ('
+            'PARTITION BY user_id ORDER BY pub_date DESC, post_id DESC'
+            f') AS position FROM {table} WHERE user_id IN ({users_sql})'
+            ') ranked WHERE position > %s)',
+            [*users_params, settings.TIMELINE_LENGTH],
+        )
+
+
+def trim_timeline(user_id):
+    """Оставляет в ленте пользователя не больше TIMELINE_LENGTH записей."""
+    trim_timelines(User.objects.filter(pk=user_id).values('pk'))
+
+
+def fan_out_posts(posts):
+    """Раскладывает посты по лентам подписчиков их авторов.
+
+    `posts` — запрос постов. Записи лент создаются одним INSERT … SELECT
+    в базе, без загрузки подписчиков в память, сколько бы их ни было.
+    """
+    qn = connection.ops.quote_name
+    table = qn(TimelineEntry._meta.db_table)
+    follows = qn(Follow._meta.db_table)
+    post_table = qn(Post._meta.db_table)
+    insert = connection.ops.insert_statement(ignore_conflicts=True)
+    suffix = connection.ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)
+    posts_sql, posts_params = posts.values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'{insert} {table} (user_id, post_id, pub_date)'
+            ' SELECT follow.user_id, post.id, post.pub_date'
+            f' FROM {follows} follow INNER JOIN {post_table} post'
+            ' ON post.author_id = follow.author_id'
+            f' WHERE post.id IN ({posts_sql}) {suffix}',
+            posts_params,
+        )
+    trim_timelines(
+        Follow.objects.filter(author_id__in=posts.values('author_id'))
+        .values('user_id').distinct()
+    )
+
+
+def fan_out_post(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    fan_out_posts(Post.objects.filter(pk=post.pk))
+
+
+def backfill_timeline(user_id, author_id):
+    """Добавляет в ленту последние посты автора после подписки."""
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id'
+    ).values_list('id', 'pub_date')[:settings.TIMELINE_LENGTH]
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for post_id, pub_date in posts
+        ],
+        ignore_conflicts=True,
+    )
+    trim_timeline(user_id)
+
+
+def remove_author(user_id, author_id):
+    """Убирает из ленты посты автора после отписки."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
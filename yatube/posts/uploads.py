@@ -0,0 +1,113 @@
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db.models.fields.files import FieldFile
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+
+class LimitedTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загрузку во временный файл, не держа её в памяти.
+
+    Байты сверх UPLOAD_MAX_BYTES не сохраняются, а у файла выставляется
+    признак too_large. Такой файл отклоняет validate_upload_size, который
+    стоит валидатором у поля картинки поста, поэтому обрезанный файл не
+    сохранит ни одна форма, включая админку.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received <= settings.UPLOAD_MAX_BYTES:
+            self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        upload = super().file_complete(file_size)
+        upload.too_large = file_size > settings.UPLOAD_MAX_BYTES
+        return upload
+
+
+def _image_path(upload):
+    if hasattr(upload, 'temporary_file_path'):
+        return upload.temporary_file_path()
+    upload.seek(0)
+    return upload
+
+
+def _downsize(upload, image_format):
+    """Уменьшает картинку до POST_IMAGE_MAX_SIDE по большей стороне.
+
+    Для JPEG draft() декодирует сразу в уменьшенном масштабе, поэтому
+    в память не попадает полноразмерный растр. Исходная загрузка
+    закрывается, её временный файл удаляется сразу.
+    """
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    with Image.open(_image_path(upload)) as image:
+        image.draft('RGB', (max_side, max_side))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_side, max_side))
+        # Безымянный временный файл хранилище копирует, а не переносит,
+        # и он удаляется сам при закрытии.
+        resized = UploadedFile(
+            tempfile.TemporaryFile(), upload.name,
+            Image.MIME.get(image_format), 0,
+        )
+        image.save(resized, format=image_format)
+    upload.close()
+    resized.size = resized.tell()
+    resized.seek(0)
+    return resized
+
+
+def validate_upload_size(upload):
+    if isinstance(upload, FieldFile):
+        # Валидатор поля модели: проверяется только новая загрузка.
+        if upload._committed:
+            return
+        upload = upload.file
+    if getattr(upload, 'too_large', False) or (
+        upload.size > settings.UPLOAD_MAX_BYTES
+    ):
+        raise ValidationError(
+            'Файл больше %(limit)s.',
+            code='file_too_large',
+            params={'limit': filesizeformat(settings.UPLOAD_MAX_BYTES)},
+        )
+
+
+def prepare_post_image(upload):
+    """Проверяет загруженную картинку по заголовку и ограничивает размер.
+
+    Возвращает исходный файл или его уменьшенную копию.
+    """
+    validate_upload_size(upload)
+    try:
+        # open() читает только заголовок, растр не декодируется.
+        with Image.open(_image_path(upload)) as image:
+            width, height = image.size
+            image_format = image.format
+            animated = getattr(image, 'is_animated', False)
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError(
+            'Загрузите правильное изображение.', code='invalid_image'
+        )
+    if image_format == 'JPEG':
+        max_pixels = settings.POST_IMAGE_MAX_PIXELS
+    else:
+        # Без draft() уменьшение декодирует растр в полном размере.
+        max_pixels = settings.POST_IMAGE_MAX_DECODED_PIXELS
+    if width * height > max_pixels:
+        raise ValidationError(
+            'Слишком большое изображение: %(width)s×%(height)s.',
+            code='too_many_pixels',
+            params={'width': width, 'height': height},
+        )
+    if max(width, height) > settings.POST_IMAGE_MAX_SIDE and not animated:
+        return _downsize(upload, image_format)
+    return upload
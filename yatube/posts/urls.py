@@ -11,6 +11,8 @@ urlpatterns = [
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     # Профайл пользователя
     path('profile/<str:username>/', views.profile, name='profile'),
+    # Поиск по постам и комментариям
+    path('search/', views.search, name='search'),
     # Просмотр записи
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     # Новая запись
@@ -21,6 +23,8 @@ urlpatterns = [
     path('posts/<int:post_id>/comment', views.add_comment, name='add_comment'),
 
     path('follow/', views.follow_index, name='follow_index'),
+    # Выгрузка своих постов
+    path('export/', views.export_posts, name='export_posts'),
 
     path(
         'profile/<str:username>/follow/',
@@ -1,24 +1,32 @@
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import (get_object_or_404,
                               redirect, render)
-from django.views.decorators.cache import cache_page
 
 from yatube.settings import PAGE_POST
 
+from . import export
+from . import search as search_index
+from .card_cache import render_cards
+from .counters import get_stats
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .models import Comment, Follow, Group, Post, User
+from .page_cache import (cached_page, linked_tags, mark_written,
+                         read_your_writes)
+from .paginator import CursorPaginator
 
 
-def get_paginator(request, posts_list):
-    paginator = Paginator(posts_list, PAGE_POST)
-    page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+def get_paginator(request, posts_list, **kwargs):
+    paginator = CursorPaginator(posts_list, PAGE_POST, **kwargs)
+    return paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
 
 
-@cache_page(20)
+@cached_page(lambda: ['index'])
 def index(request):
-    posts_list = Post.objects.all()
+    posts_list = Post.objects.select_related('author', 'group')
     page_obj = get_paginator(request, posts_list)
     context = {
         'page_obj': page_obj,
@@ -26,9 +34,10 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+@cached_page(lambda slug: [f'group:{slug}'])
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts_list = group.group_posts.all()
+    posts_list = group.group_posts.select_related('author', 'group')
     page_obj = get_paginator(request, posts_list)
     context = {
         'page_obj': page_obj,
@@ -37,26 +46,53 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+def _post_tags(post_id):
+    """Страница поста зависит от автора, группы и комментаторов."""
+    def get_linked():
+        # Одним запросом: строка на каждый комментарий, без них — одна.
+        rows = Post.objects.filter(pk=post_id).values_list(
+            'author_id', 'group_id', 'comments__author_id')
+        tags = set()
+        for author_id, group_id, commenter_id in rows:
+            tags.add(f'author:{author_id}')
+            if group_id:
+                tags.add(f'in-group:{group_id}')
+            if commenter_id:
+                tags.add(f'commenter:{commenter_id}')
+        return sorted(tags)
+    return linked_tags(f'post:{post_id}', get_linked)
+
+
+# Названия групп видны в профилях всех авторов, а переименования групп
+# редки: их сбрасывает один общий тег groups.
+@cached_page(lambda username: [f'profile:{username}', 'groups'])
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts_list = author.posts.all()
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    posts_list = author.posts.select_related('author', 'group')
     page_obj = get_paginator(request, posts_list)
+    stats = get_stats(author)
 
     following = author.following.exists()
 
     context = {
         'page_obj': page_obj,
         'author': author,
-        'count_post': posts_list.count(),
+        'count_post': stats.posts_count,
+        'stats': stats,
         'following': following
     }
     return render(request, 'posts/profile.html', context)
 
 
+@cached_page(_post_tags)
 def post_detail(request, post_id):
-    one_post = get_object_or_404(Post, pk=post_id)
-    count_post = one_post.author.posts.count()
-    comments = one_post.comments.all()
+    one_post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), pk=post_id
+    )
+    count_post = get_stats(one_post.author).posts_count
+    comments = one_post.comments.select_related('author').order_by('created')
     comment_form = CommentForm()
     context = {
         'one_post': one_post,
@@ -67,7 +103,42 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+def search(request):
+    query_text = request.GET.get('q', '').strip()
+    hits, next_cursor = search_index.search(
+        search_index.build_query(query_text),
+        PAGE_POST,
+        after=request.GET.get('after'),
+    )
+    posts = Post.objects.select_related('author', 'group').in_bulk(
+        {post_id for _, post_id in hits}
+    )
+    comments = Comment.objects.select_related('author').in_bulk(
+        [rowid // 2 for rowid, _ in hits if rowid & 1]
+    )
+    # Пост и его комментарии могут совпасть одновременно: показываем
+    # пост один раз, в порядке лучшего совпадения.
+    matched = {}
+    for rowid, post_id in hits:
+        if post_id not in posts:
+            continue
+        post_comments = matched.setdefault(post_id, [])
+        comment = comments.get(rowid // 2) if rowid & 1 else None
+        if comment is not None:
+            post_comments.append(comment)
+    found = [posts[post_id] for post_id in matched]
+    results = zip(render_cards(found), matched.values())
+    context = {
+        'query': query_text,
+        'results': list(results),
+        'next_cursor': next_cursor,
+        'is_next_page': 'after' in request.GET,
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
+@read_your_writes
 def post_create(request):
     if request.method != 'POST':
         form = PostForm()
@@ -78,11 +149,13 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        mark_written(request)
         return redirect('posts:profile', username=post.author)
 
     return render(request, 'posts/create_post.html', {'form': form})
 
 
+@read_your_writes
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     if post.author != request.user:
@@ -95,6 +168,7 @@ def post_edit(request, post_id):
     )
     if form.is_valid():
         form.save()
+        mark_written(request)
         return redirect('posts:post_detail', post_id=post_id)
     context = {
         'form': form,
@@ -105,6 +179,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@read_your_writes
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -113,15 +188,17 @@ def add_comment(request, post_id):
         comment.author = request.user
         comment.post = post
         comment.save()
+        mark_written(request)
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    user = request.user
-    followings = user.follower.values_list('author', flat=True)
-    posts_list = Post.objects.filter(author__in=followings)
-    page_obj = get_paginator(request, posts_list)
+    timeline = request.user.timeline.select_related(
+        'post__author', 'post__group'
+    )
+    page_obj = get_paginator(request, timeline, pk_field='post_id')
+    page_obj.object_list = [entry.post for entry in page_obj.object_list]
     context = {
         'page_obj': page_obj,
     }
@@ -129,17 +206,44 @@ def follow_index(request):
 
 
 @login_required
+@read_your_writes
 def profile_follow(request, username):
     user = request.user
     author = get_object_or_404(User, username=username)
     if user != author:
         Follow.objects.get_or_create(user=user, author=author)
+        mark_written(request)
         return redirect('posts:profile', username=username)
     return redirect('posts:profile', username=username)
 
 
 @login_required
+@read_your_writes
 def profile_unfollow(request, username):
-    Follow.objects.filter(
+    deleted, _ = Follow.objects.filter(
         user=request.user, author__username=username).delete()
+    if deleted:
+        mark_written(request)
     return redirect('posts:profile', username=username)
+
+
+@login_required
+def export_posts(request):
+    """Выгрузка всех постов пользователя файлом JSONL или CSV."""
+    file_format = request.GET.get('format', 'jsonl')
+    if file_format not in export.FORMATS:
+        raise Http404
+    compress = request.GET.get('gzip') == '1'
+    lines = export.export_lines(
+        'posts', file_format, queryset=request.user.posts.all()
+    )
+    response = StreamingHttpResponse(
+        export.encode_chunks(lines, compress=compress),
+        content_type=(
+            'application/gzip' if compress
+            else export.CONTENT_TYPES[file_format]
+        ),
+    )
+    filename = f'posts.{file_format}' + ('.gz' if compress else '')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -32,11 +32,17 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
+    'jobs.apps.JobsConfig',
+    'benchmarks.apps.BenchmarksConfig',
     'sorl.thumbnail',
     'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.TimingMiddleware',
+    'core.middleware.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -45,6 +51,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'core.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -131,15 +138,178 @@ LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма уходят через очередь задач, обработчик отправляет их
+# через JOBS_EMAIL_BACKEND
+EMAIL_BACKEND = 'jobs.mail.QueuedEmailBackend'
+JOBS_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 PAGE_POST = 10
 
+# Сколько последних постов хранится в ленте подписок пользователя
+TIMELINE_LENGTH = 1000
+
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+# Страницы для анонимных посетителей сбрасываются сигналами моделей, и
+# с общим кэшем (Memcached, Redis) таймаут нужен только как страховка.
+# У LocMemCache свой кэш в каждом процессе: сигнал сбрасывает страницу
+# только в процессе, где была запись, поэтому таймаут остаётся коротким.
+LOCAL_CACHE = CACHES['default']['BACKEND'] == (
+    'django.core.cache.backends.locmem.LocMemCache')
+PAGE_CACHE_TIMEOUT = 20 if LOCAL_CACHE else 60 * 60
+# Cookie, отключающая кэш страниц для автора только что сделанной записи
+PAGE_CACHE_BYPASS_COOKIE = 'yatube_fresh'
+# Карточки постов версионируются сигналами, как и страницы.
+CARD_CACHE_TIMEOUT = 20 if LOCAL_CACHE else 60 * 60 * 24
+
+# Загрузки всегда пишутся во временный файл, а не в память
+FILE_UPLOAD_HANDLERS = [
+    'posts.uploads.LimitedTemporaryFileUploadHandler',
+]
+UPLOAD_MAX_BYTES = 10 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 40 * 1000 * 1000
+# Предел для остальных форматов: JPEG при уменьшении декодируется сразу в
+# малом масштабе, а PNG, GIF, BMP — целиком, 4 байта на пиксель
+POST_IMAGE_MAX_DECODED_PIXELS = 12 * 1000 * 1000
+# Картинки больше этого размера по большей стороне уменьшаются при загрузке
+POST_IMAGE_MAX_SIDE = 2560
+
+# Процессы, в которых создаются миниатюры картинок постов
+THUMBNAIL_WORKERS = 2
+
+# Фоновые задачи: ведение лент подписок и письма (миниатюры создаются
+# в своём пуле процессов, см. THUMBNAIL_WORKERS). Пока JOBS_EAGER
+# включён, задачи выполняются сразу при постановке в очередь, в том же
+# HTTP-запросе. Так сайт работает без отдельного процесса: при runserver
+# и в тестах, которые ждут ленту сразу после подписки. На рабочем сервере
+# задайте JOBS_EAGER=False и запустите manage.py run_workers, иначе
+# задачи не уходят с пути запроса; check --deploy об этом напоминает.
+JOBS_EAGER = os.getenv('JOBS_EAGER', 'True') == 'True'
+JOBS_WORKERS = 2
+JOBS_POLL_INTERVAL = 1.0
+JOBS_MAX_ATTEMPTS = 5
+# Пауза перед повтором удваивается от JOBS_BACKOFF_BASE до JOBS_BACKOFF_MAX
+JOBS_BACKOFF_BASE = 10
+JOBS_BACKOFF_MAX = 60 * 60
+# Задача, которая выполняется дольше, считается брошенной и перезапускается
+JOBS_LOCK_TIMEOUT = 10 * 60
+
+# Списки админки длиннее этого числа строк не пересчитываются через COUNT(*)
+ADMIN_EXACT_COUNT_LIMIT = 10000
+# Размер порции для массовых действий в админке; меньше лимита SQLite
+# на число параметров запроса
+BULK_BATCH_SIZE = 500
+# Сколько объектов manage.py seed_data создаёт в одной транзакции
+SEED_BATCH_SIZE = 10000
+# Сколько строк выгрузка читает из базы за один запрос
+EXPORT_CHUNK_SIZE = 2000
+
+# Замеры manage.py run_benchmarks: файл с базовыми замерами и допустимый
+# рост p95 — относительный и не меньше BENCHMARK_MIN_DELTA_MS
+BENCHMARK_BASELINE = os.path.join(BASE_DIR, 'benchmarks', 'baseline.json')
+BENCHMARK_THRESHOLD = 0.5
+BENCHMARK_MIN_DELTA_MS = 5
+
+# Доля запросов, для которых собираются замеры SQL, шаблонов и кэша:
+# строка в лог yatube.requests и заголовок Server-Timing. 0 — выключено.
+REQUEST_TIMING_SAMPLE_RATE = float(
+    os.getenv('REQUEST_TIMING_SAMPLE_RATE', '0'))
+# Отдавать ли замеры сотрудникам (is_staff) в заголовке Server-Timing.
+# Остальным заголовок не отдаётся: по нему видно, сколько SQL-запросов и
+# промахов кэша стоит страница.
+REQUEST_TIMING_HEADER = os.getenv('REQUEST_TIMING_HEADER', 'False') == 'True'
+# Библиотеки шаблонов, теги и фильтры которых замеряются по отдельности
+TEMPLATE_PROFILE_LIBRARIES = (
+    'user_filters', 'post_cards', 'post_thumbnails', 'thumbnail',
+)
+# Время шаблонов замеренных запросов для manage.py template_report
+TEMPLATE_PROFILE_LOG = os.getenv(
+    'TEMPLATE_PROFILE_LOG', os.path.join(BASE_DIR, 'template_profile.log'))
+
+# Профили запросов (см. core/profiling.py). Без заказа профилируется доля
+# PROFILING_SAMPLE_RATE запросов в режиме PROFILING_SAMPLE_MODE.
+PROFILING_DIR = os.getenv(
+    'PROFILING_DIR', os.path.join(BASE_DIR, 'profiles'))
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_SAMPLE_MODE = 'sample'
+# Интервал сэмплера стеков, секунды
+PROFILING_SAMPLE_INTERVAL = 0.005
+# Сколько секунд действует токен из manage.py profile_token
+PROFILING_TOKEN_MAX_AGE = 60 * 60
+# Сколько профилей по токену процесс снимает за минуту
+PROFILING_TOKEN_RATE = 10
+# Сколько профилей хранится в PROFILING_DIR; старые удаляются
+PROFILING_MAX_FILES = 200
+
+# SQL-запросы дольше стольких миллисекунд пишутся в SLOW_QUERY_LOG вместе
+# с планом запроса. 0 — журнал выключен.
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '200'))
+# Писать ли в журнал параметры запросов. Они попадают туда как есть,
+# включая хэши паролей и ключи сессий, поэтому по умолчанию выключено.
+SLOW_QUERY_PARAMS = os.getenv('SLOW_QUERY_PARAMS', 'False') == 'True'
+SLOW_QUERY_LOG = os.getenv(
+    'SLOW_QUERY_LOG', os.path.join(BASE_DIR, 'slow_queries.log'))
+
+# Метрики Prometheus (/metrics). При нескольких рабочих процессах каждый
+# пишет снимок своих метрик в METRICS_DIR не чаще раза в
+# METRICS_FLUSH_INTERVAL секунд; каталог очищают при перезапуске сайта.
+# Без METRICS_DIR отдаются метрики одного процесса.
+METRICS_DIR = os.getenv('METRICS_DIR')
+METRICS_FLUSH_INTERVAL = 5
+# Токен для заголовка Authorization: Bearer. Без него /metrics закрыт,
+# если METRICS_ALLOW_INTERNAL_IPS не разрешает доступ с адресов INTERNAL_IPS:
+# за обратным прокси REMOTE_ADDR у всех запросов один и тот же.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+METRICS_ALLOW_INTERNAL_IPS = (
+    os.getenv('METRICS_ALLOW_INTERNAL_IPS', 'False') == 'True')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            # Файл создаётся при первом медленном запросе.
+            'delay': True,
+        },
+        'template_profile': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': TEMPLATE_PROFILE_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'yatube.requests': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'yatube.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+        'yatube.templates': {
+            'handlers': ['template_profile'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'